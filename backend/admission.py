@@ -0,0 +1,97 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+logger = logging.getLogger("infomap-api")
+
+
+class Priority(IntEnum):
+    """Wait queue ordering for upstream slots (lower is served first)."""
+    ADMIN = 0
+    INTERACTIVE = 1
+    PREFETCH = 2
+
+
+class AdmissionRejected(Exception):
+    """Raised when the gate sheds a request instead of queueing it."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Upstream saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """Bounded concurrency gate with a short priority wait queue.
+
+    At most ``max_concurrent`` callers hold a slot at a time. Further callers
+    wait in priority order; once ``max_queue`` callers are already waiting,
+    or a caller has waited ``max_wait`` seconds, the request is rejected with
+    ``AdmissionRejected`` so latency stays bounded under overload.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_queue: int = 16,
+        max_wait: float = 10.0,
+        retry_after: int = 5,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self._active = 0
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active,
+            "queued": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+        }
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE):
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise AdmissionRejected(self.retry_after)
+
+        entry = (priority, next(self._seq), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, entry)
+        future = entry[2]
+        try:
+            # The releasing caller hands its slot over by resolving the future
+            await asyncio.wait_for(future, self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Slot was handed over at the last moment: give it back
+                self.release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if isinstance(e, asyncio.TimeoutError):
+                logger.warning(f"Upstream slot wait exceeded {self.max_wait}s (priority {priority.name})")
+                raise AdmissionRejected(self.retry_after)
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.INTERACTIVE):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger("infomap-api")
+
+
+class UserCache:
+    """Per-worker cache of User rows, invalidated across worker processes.
+
+    Any worker that changes users bumps the shared "users" state version;
+    every worker re-reads that version at most once per ``check_interval``
+    seconds and drops its cache when it moved, so stale entries live for at
+    most that long.
+    """
+
+    VERSION_NAME = "users"
+
+    def __init__(self, db_service, check_interval: float = 1.0):
+        self.db_service = db_service
+        self.check_interval = check_interval
+        self._users: Dict[str, object] = {}
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    def _validate(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        version = self.db_service.get_state_version(self.VERSION_NAME)
+        if version != self._version:
+            self._users.clear()
+            self._version = version
+
+    def get_or_create(self, email: str):
+        self._validate()
+        user = self._users.get(email)
+        if user is None:
+            user = self.db_service.get_or_create_user(email)
+            self._users[email] = user
+        return user
+
+    def invalidate(self):
+        """Drop this worker's entries and signal the other workers."""
+        self.db_service.bump_state_version(self.VERSION_NAME)
+        self._users.clear()
+        self._version = None
+        self._checked_at = 0.0
+
+
+class RefreshFeed:
+    """Publishes GlobalCache rows written by any worker to the local hub.
+
+    Each worker tails the cache table by id, so a refresh produced by one
+    process reaches push subscribers connected to every process.
+    """
+
+    def __init__(
+        self,
+        db_service,
+        publish: Callable[[tuple, dict], int],
+        interval: float = 1.0,
+        active: Callable[[], bool] = lambda: True
+    ):
+        self.db_service = db_service
+        self.publish = publish
+        self.interval = interval
+        self.active = active
+        self.last_id = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task:
+            return
+        self.last_id = self.db_service.get_last_cache_id()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def poll(self) -> int:
+        """Publish every cache row newer than the last one seen."""
+        published = 0
+        while True:
+            rows = self.db_service.get_cache_entries_after(self.last_id)
+            if not rows:
+                return published
+            for row in rows:
+                self.publish((row.country, row.topic, row.time_filter), {
+                    "country": row.country, "time_filter": row.time_filter, "topic": row.topic,
+                    "news": json.loads(row.news_json),
+                    "stats": json.loads(row.stats_json) if row.stats_json else None,
+                    "refreshed_at": row.created_at.isoformat()
+                })
+                published += 1
+            self.last_id = rows[-1].id
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if self.active():
+                    self.poll()
+                else:
+                    # Nobody listening here: skip ahead without loading payloads
+                    self.last_id = self.db_service.get_last_cache_id()
+            except Exception as e:
+                logger.error(f"Cache refresh feed error: {e}")
@@ -1,9 +1,26 @@
-from sqlmodel import Session, select, create_engine, SQLModel
-from models import User, DailyQuota
-from datetime import datetime
+from typing import Optional, Tuple
+from dataclasses import dataclass
+from collections import defaultdict
+from sqlmodel import Session, select, create_engine, SQLModel, func
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import make_transient
+from models import (
+    User, DailyQuota, QueryHistory, GlobalCache, UsageRollup, UserUsageRollup, Watchlist,
+    CacheLease, StateVersion, CacheTTLState
+)
+from ttl_policy import TTLPolicy, headline_fingerprint, change_ratio
+import search_index
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 import os
 
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; single-process dev only there
+    fcntl = None
+
 # Helper for Paris time in database service if needed (date is usually passed from main.py)
 def get_paris_today():
     return datetime.now(ZoneInfo("Europe/Paris")).strftime('%Y-%m-%d')
@@ -11,9 +28,86 @@ def get_paris_today():
 # Admin email from environment variable (security improvement)
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "pl.bellier@gmail.com")
 
+def cache_key(country: str, time_filter: str, topic: str) -> str:
+    return f"{country}|{time_filter}|{topic}"
+
+ROLLUP_COUNTERS = ("requests", "cache_hits", "upstream_calls", "upstream_tokens")
+
+@dataclass
+class LeaseRelease:
+    """Releases a cache lease in the same transaction as the refreshed rows."""
+    key: str
+    owner: str
+
+@dataclass
+class UsageEvent:
+    """A completed news request, folded into the usage rollups on write."""
+    date: str
+    user_id: int
+    country: str
+    topic: str
+    cache_hit: bool = False
+    upstream_call: bool = False
+    upstream_tokens: int = 0
+
+    def counters(self) -> dict:
+        return {
+            "requests": 1,
+            "cache_hits": int(self.cache_hit),
+            "upstream_calls": int(self.upstream_call),
+            "upstream_tokens": self.upstream_tokens
+        }
+
+def _rollback_leftover_transaction(dbapi_connection, connection_record, reset_state):
+    # A failed COMMIT (e.g. "database is locked") leaves the SQLite transaction
+    # open, but SQLAlchemy considers it ended and skips its rollback-on-return;
+    # the next checkout would otherwise carry on (and later commit) it
+    if getattr(dbapi_connection, "in_transaction", False):
+        dbapi_connection.rollback()
+
 class DatabaseService:
-    def __init__(self, engine):
+    def __init__(self, engine, ttl_policy: Optional[TTLPolicy] = None):
         self.engine = engine
+        if not event.contains(engine, "reset", _rollback_leftover_transaction):
+            event.listen(engine, "reset", _rollback_leftover_transaction)
+        self.ttl_policy = ttl_policy or TTLPolicy()
+        self.ensure_search_index()
+
+    def ensure_search_index(self) -> None:
+        """Create the headline full-text index, backfilling it on first creation."""
+        with self.engine.begin() as connection:
+            created = search_index.create_search_index(connection)
+        if created:
+            self.rebuild_search_index()
+
+    def rebuild_search_index(self, chunk_size: int = 5000) -> None:
+        with self.engine.begin() as connection:
+            search_index.remove_entries(connection, "cache")
+            search_index.remove_entries(connection, "history")
+            # Only the latest refresh of each cache key is searchable
+            table = GlobalCache.__table__
+            latest = select(func.max(table.c.id)).group_by(table.c.country, table.c.time_filter, table.c.topic)
+            rows = connection.execute(table.select().where(table.c.id.in_(latest)).order_by(table.c.id)).all()
+            search_index.index_rows(connection, rows, "cache")
+
+            table = QueryHistory.__table__
+            last_id = 0
+            while True:
+                rows = connection.execute(
+                    table.select().where(table.c.id > last_id).order_by(table.c.id).limit(chunk_size)
+                ).all()
+                if not rows:
+                    break
+                search_index.index_rows(connection, rows, "history")
+                last_id = rows[-1].id
+
+    def search_headlines(self, query: str, user_id: int, **kwargs) -> list:
+        with self.engine.connect() as connection:
+            return search_index.search(connection, query, user_id, **kwargs)
+
+    def remove_search_entries(self, kind: str, ref_id: Optional[int] = None, user_id: Optional[int] = None) -> None:
+        with self.engine.begin() as connection:
+            search_index.remove_entries(connection, kind, ref_id=ref_id, user_id=user_id)
 
     def get_or_create_user(self, email: str) -> User:
         with Session(self.engine) as session:
@@ -89,11 +183,10 @@ class DatabaseService:
             return quota.count
 
     def get_cached_news(self, country: str, time_filter: str, topic: str):
-        from models import GlobalCache
-        from datetime import timedelta
-        cutoff = datetime.utcnow() - timedelta(hours=4)
-        
         with Session(self.engine) as session:
+            state = session.get(CacheTTLState, cache_key(country, time_filter, topic))
+            ttl = state.ttl_seconds if state else self.ttl_policy.baseline(time_filter, topic)
+            cutoff = datetime.utcnow() - timedelta(seconds=ttl)
             statement = select(GlobalCache).where(
                 GlobalCache.country == country,
                 GlobalCache.time_filter == time_filter,
@@ -102,22 +195,385 @@ class DatabaseService:
             ).order_by(GlobalCache.created_at.desc())
             return session.exec(statement).first()
 
+    def _update_ttl_state(self, session: Session, entry: GlobalCache) -> None:
+        """Adapt the key's TTL to how much the refreshed stories changed."""
+        key = cache_key(entry.country, entry.time_filter, entry.topic)
+        fingerprint = headline_fingerprint(entry.news_json)
+        state = session.get(CacheTTLState, key)
+        if not state:
+            state = CacheTTLState(
+                key=key,
+                ttl_seconds=self.ttl_policy.baseline(entry.time_filter, entry.topic),
+                fingerprint=" ".join(fingerprint)
+            )
+        else:
+            ratio = change_ratio(state.fingerprint.split(), fingerprint)
+            state.ttl_seconds = self.ttl_policy.next_ttl(state.ttl_seconds, ratio)
+            state.fingerprint = " ".join(fingerprint)
+            if ratio >= self.ttl_policy.change_threshold:
+                state.changes += 1
+            else:
+                state.unchanged += 1
+            state.updated_at = datetime.utcnow()
+        session.add(state)
+        session.flush()
+
     def set_cached_news(self, country: str, time_filter: str, topic: str, news_json: str, stats_json: Optional[str]):
-        from models import GlobalCache
-        with Session(self.engine) as session:
-            cache_entry = GlobalCache(
-                country=country,
-                time_filter=time_filter,
-                topic=topic,
-                news_json=news_json,
-                stats_json=stats_json
+        cache_entry = GlobalCache(
+            country=country,
+            time_filter=time_filter,
+            topic=topic,
+            news_json=news_json,
+            stats_json=stats_json
+        )
+        self.write_batch([cache_entry])
+
+    def write_batch(self, items: list) -> None:
+        """Insert a batch of rows and usage events in a single transaction.
+
+        When the transaction fails, the rows are handed back transient and
+        without ids, so the same batch (or any of its rows) can be retried.
+        """
+        rows = [i for i in items if not isinstance(i, (UsageEvent, LeaseRelease))]
+        events = [i for i in items if isinstance(i, UsageEvent)]
+        releases = [i for i in items if isinstance(i, LeaseRelease)]
+        new_rows = [r for r in rows if r.id is None]
+        try:
+            with Session(self.engine) as session:
+                session.add_all(rows)
+                session.flush()  # Assign ids before indexing headlines
+                connection = session.connection()
+                for row in rows:
+                    if isinstance(row, GlobalCache):
+                        self._update_ttl_state(session, row)
+                search_index.index_rows(connection, [r for r in rows if isinstance(r, GlobalCache)], "cache")
+                search_index.index_rows(connection, [r for r in rows if isinstance(r, QueryHistory)], "history")
+                self._apply_usage_events(session, events)
+                for release in releases:
+                    self._delete_lease(session, release.key, release.owner)
+                session.commit()
+        except Exception:
+            # Closing the failed session detaches flushed rows with ids from
+            # the rolled-back transaction; a retry would then insert nothing
+            for row in new_rows:
+                make_transient(row)
+                row.id = None
+            raise
+
+    def _apply_usage_events(self, session: Session, events: list) -> None:
+        # Pre-aggregate in memory so each rollup row is upserted once per batch
+        by_topic = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTERS, 0))
+        by_user = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTERS, 0))
+        for event in events:
+            for name, value in event.counters().items():
+                by_topic[(event.date, event.country, event.topic)][name] += value
+                by_user[(event.date, event.user_id)][name] += value
+
+        for (date_str, country, topic), counters in by_topic.items():
+            self._upsert_rollup(
+                session, UsageRollup, ["date", "country", "topic"],
+                dict(date=date_str, country=country, topic=topic, **counters)
+            )
+        for (date_str, user_id), counters in by_user.items():
+            self._upsert_rollup(
+                session, UserUsageRollup, ["date", "user_id"],
+                dict(date=date_str, user_id=user_id, **counters)
+            )
+
+    def _upsert_rollup(self, session: Session, model, keys: list, values: dict) -> None:
+        table = model.__table__
+        statement = sqlite_insert(table).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={name: table.c[name] + statement.excluded[name] for name in ROLLUP_COUNTERS}
+        )
+        session.execute(statement)
+
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        """Take the refresh lease on a cache key unless another owner holds a live one."""
+        now = datetime.utcnow()
+        table = CacheLease.__table__
+        statement = sqlite_insert(table).values(
+            key=key, owner=owner, expires_at=now + timedelta(seconds=ttl)
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["key"],
+            set_={"owner": statement.excluded.owner, "expires_at": statement.excluded.expires_at},
+            where=table.c.expires_at < now
+        )
+        with Session(self.engine) as session:
+            session.execute(statement)
+            holder = session.exec(select(CacheLease.owner).where(CacheLease.key == key)).first()
+            session.commit()
+        return holder == owner
+
+    def is_lease_held(self, key: str) -> bool:
+        with Session(self.engine) as session:
+            statement = select(CacheLease.key).where(
+                CacheLease.key == key, CacheLease.expires_at >= datetime.utcnow()
+            )
+            return session.exec(statement).first() is not None
+
+    def release_lease(self, key: str, owner: str) -> None:
+        with Session(self.engine) as session:
+            self._delete_lease(session, key, owner)
+            session.commit()
+
+    def _delete_lease(self, session: Session, key: str, owner: str) -> None:
+        lease = session.get(CacheLease, key)
+        if lease and lease.owner == owner:
+            session.delete(lease)
+
+    def get_state_version(self, name: str) -> int:
+        with Session(self.engine) as session:
+            state = session.get(StateVersion, name)
+            return state.version if state else 0
+
+    def bump_state_version(self, name: str) -> None:
+        table = StateVersion.__table__
+        statement = sqlite_insert(table).values(name=name, version=1)
+        statement = statement.on_conflict_do_update(
+            index_elements=["name"], set_={"version": table.c.version + 1}
+        )
+        with Session(self.engine) as session:
+            session.execute(statement)
+            session.commit()
+
+    def get_cache_entries_after(self, last_id: int, limit: int = 100) -> list:
+        """Cache rows written after ``last_id`` (by any worker), oldest first."""
+        with Session(self.engine) as session:
+            statement = (
+                select(GlobalCache).where(GlobalCache.id > last_id).order_by(GlobalCache.id).limit(limit)
             )
-            session.add(cache_entry)
+            return session.exec(statement).all()
+
+    def get_last_cache_id(self) -> int:
+        with Session(self.engine) as session:
+            return session.exec(select(func.max(GlobalCache.id))).first() or 0
+
+    def get_usage_analytics(self, start_date: str, end_date: str, top: int = 10) -> dict:
+        """Summarize usage between two YYYY-MM-DD dates (inclusive).
+
+        Reads only the rollup tables, so the cost depends on the date range
+        and the number of distinct keys, not on the size of the history.
+        """
+        in_range = (UsageRollup.date >= start_date, UsageRollup.date <= end_date)
+        requests = func.sum(UsageRollup.requests)
+        with Session(self.engine) as session:
+            daily = session.exec(
+                select(
+                    UsageRollup.date,
+                    requests,
+                    func.sum(UsageRollup.cache_hits),
+                    func.sum(UsageRollup.upstream_calls),
+                    func.sum(UsageRollup.upstream_tokens)
+                ).where(*in_range).group_by(UsageRollup.date).order_by(UsageRollup.date)
+            ).all()
+            countries = session.exec(
+                select(UsageRollup.country, requests).where(*in_range)
+                .group_by(UsageRollup.country).order_by(requests.desc()).limit(top)
+            ).all()
+            topics = session.exec(
+                select(UsageRollup.topic, requests).where(*in_range)
+                .group_by(UsageRollup.topic).order_by(requests.desc())
+            ).all()
+            user_requests = func.sum(UserUsageRollup.requests)
+            users = session.exec(
+                select(
+                    User.email,
+                    user_requests,
+                    func.sum(UserUsageRollup.upstream_calls)
+                ).join(User, User.id == UserUsageRollup.user_id)
+                .where(UserUsageRollup.date >= start_date, UserUsageRollup.date <= end_date)
+                .group_by(UserUsageRollup.user_id).order_by(user_requests.desc()).limit(top)
+            ).all()
+
+        return {
+            "daily": [
+                {
+                    "date": d,
+                    "requests": req,
+                    "cache_hits": hits,
+                    "cache_hit_ratio": round(hits / req, 3) if req else 0.0,
+                    "upstream_calls": calls,
+                    "upstream_tokens": tokens
+                }
+                for d, req, hits, calls, tokens in daily
+            ],
+            "top_countries": [{"country": c, "requests": n} for c, n in countries],
+            "topics": [{"topic": t, "requests": n} for t, n in topics],
+            "top_users": [
+                {"email": e, "requests": n, "upstream_calls": calls} for e, n, calls in users
+            ]
+        }
+
+    def iter_users_with_quota(self, date_str: str, chunk_size: int = 1000):
+        """Yield (User, count for date_str) in id order, one chunk per query."""
+        last_id = 0
+        while True:
+            statement = (
+                select(User, DailyQuota.count)
+                .outerjoin(DailyQuota, (DailyQuota.user_id == User.id) & (DailyQuota.date == date_str))
+                .where(User.id > last_id)
+                .order_by(User.id)
+                .limit(chunk_size)
+            )
+            with Session(self.engine) as session:
+                rows = session.exec(statement).all()
+            if not rows:
+                return
+            for user, count in rows:
+                yield user, count or 0
+            last_id = rows[-1][0].id
+
+    def upsert_users(self, rows: list, protected: tuple = ()) -> Tuple[int, int, list]:
+        """Create or update users in a single transaction.
+
+        Each row is a dict with ``email``, ``is_active`` and
+        ``max_daily_quota``. Admin rights are never granted this way, and
+        admin accounts (plus the ``protected`` emails) are left untouched.
+        Returns (created, updated, skipped emails).
+        """
+        with Session(self.engine) as session:
+            admins = {e.lower() for e in session.exec(select(User.email).where(User.is_admin)).all()}
+            blocked = admins | {e.lower() for e in protected} | {ADMIN_EMAIL.lower()}
+            skipped = [row["email"] for row in rows if row["email"] in blocked]
+            rows = [row for row in rows if row["email"] not in blocked]
+            if not rows:
+                return 0, 0, skipped
+            emails = [row["email"] for row in rows]
+            existing = set(session.exec(select(User.email).where(User.email.in_(emails))).all())
+            table = User.__table__
+            statement = sqlite_insert(table).values([dict(row, is_admin=False) for row in rows])
+            statement = statement.on_conflict_do_update(
+                index_elements=["email"],
+                set_={
+                    "is_active": statement.excluded.is_active,
+                    "max_daily_quota": statement.excluded.max_daily_quota
+                },
+                where=table.c.is_admin == False  # noqa: E712
+            )
+            session.execute(statement)
             session.commit()
+        created = len(set(emails) - existing)
+        return created, len(rows) - created, skipped
+
+    def get_watchlist(self, user_id: int) -> list:
+        with Session(self.engine) as session:
+            statement = select(Watchlist).where(Watchlist.user_id == user_id).order_by(Watchlist.id)
+            return session.exec(statement).all()
+
+    def add_watch(self, user_id: int, country: str, topic: str, time_filter: str) -> Watchlist:
+        """Add a watched key, returning the existing entry if already watched."""
+        with Session(self.engine) as session:
+            statement = select(Watchlist).where(
+                Watchlist.user_id == user_id,
+                Watchlist.country == country,
+                Watchlist.topic == topic,
+                Watchlist.time_filter == time_filter
+            )
+            item = session.exec(statement).first()
+            if not item:
+                item = Watchlist(user_id=user_id, country=country, topic=topic, time_filter=time_filter)
+                session.add(item)
+                session.commit()
+                session.refresh(item)
+            return item
+
+    def remove_watch(self, user_id: int, watch_id: int) -> bool:
+        with Session(self.engine) as session:
+            statement = select(Watchlist).where(Watchlist.id == watch_id, Watchlist.user_id == user_id)
+            item = session.exec(statement).first()
+            if not item:
+                return False
+            session.delete(item)
+            session.commit()
+            return True
+
+    def get_history_page(
+        self,
+        user_id: int,
+        since: datetime,
+        limit: int = 20,
+        before: Optional[Tuple[datetime, int]] = None,
+        summary: bool = False
+    ) -> list:
+        """Return one page of a user's history, newest first.
+
+        Pages are keyed on (created_at, id): pass the last row's values as
+        ``before`` to fetch the next page. With ``summary`` the JSON payload
+        columns are not selected at all.
+        """
+        columns = [
+            QueryHistory.id,
+            QueryHistory.country,
+            QueryHistory.time_filter,
+            QueryHistory.topic,
+            QueryHistory.created_at
+        ]
+        if not summary:
+            columns += [QueryHistory.news_json, QueryHistory.stats_json]
+
+        statement = select(*columns).where(
+            QueryHistory.user_id == user_id,
+            QueryHistory.created_at >= since
+        )
+        if before:
+            before_at, before_id = before
+            statement = statement.where(
+                (QueryHistory.created_at < before_at) |
+                ((QueryHistory.created_at == before_at) & (QueryHistory.id < before_id))
+            )
+        statement = statement.order_by(
+            QueryHistory.created_at.desc(), QueryHistory.id.desc()
+        ).limit(limit)
+
+        with Session(self.engine) as session:
+            return session.exec(statement).all()
+
+    def get_history_item(self, user_id: int, history_id: int) -> Optional[QueryHistory]:
+        with Session(self.engine) as session:
+            statement = select(QueryHistory).where(
+                QueryHistory.id == history_id,
+                QueryHistory.user_id == user_id
+            )
+            return session.exec(statement).first()
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    # WAL lets readers proceed while another worker process writes
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+@contextmanager
+def _setup_lock(engine):
+    """Serialize schema setup across worker processes sharing a SQLite file.
+
+    create_all checks and creates tables in separate steps, so workers
+    starting together on a fresh or upgraded database race each other.
+    """
+    path = engine.url.database
+    if fcntl is None or not path or path == ":memory:":
+        yield
+        return
+    with open(f"{path}.setup.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
 
 # Global instance initialization helper
-def get_db_service(sqlite_url: str):
+def get_db_service(sqlite_url: str, ttl_policy: Optional[TTLPolicy] = None):
     engine = create_engine(sqlite_url)
-    from models import User, DailyQuota, QueryHistory, GlobalCache
-    SQLModel.metadata.create_all(engine)
-    return DatabaseService(engine)
+    if sqlite_url.startswith("sqlite:///"):
+        event.listen(engine, "connect", _configure_sqlite)
+    with _setup_lock(engine):
+        SQLModel.metadata.create_all(engine)
+        # create_all skips indexes of tables that already exist
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(engine, checkfirst=True)
+        # Only the first worker finds the FTS table missing and backfills it
+        return DatabaseService(engine, ttl_policy)
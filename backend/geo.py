@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # Brotli bodies are optional, gzip is always built
+    brotli = None
+
+logger = logging.getLogger("infomap-api")
+
+# Properties the globe actually reads; everything else is dropped when simplifying
+KEPT_PROPERTIES = ("NAME", "ADMIN", "ISO_A2", "ISO_A3")
+
+
+def _quantize_ring(ring: list, precision: int) -> list:
+    points = []
+    for point in ring:
+        rounded = [round(point[0], precision), round(point[1], precision)]
+        if not points or points[-1] != rounded:
+            points.append(rounded)
+    # A linear ring needs at least 4 positions; keep the original otherwise
+    return points if len(points) >= 4 else ring
+
+
+def _quantize_geometry(geometry: Optional[dict], precision: int) -> Optional[dict]:
+    if not geometry:
+        return geometry
+    if geometry["type"] == "Polygon":
+        coordinates = [_quantize_ring(r, precision) for r in geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        coordinates = [
+            [_quantize_ring(r, precision) for r in polygon]
+            for polygon in geometry["coordinates"]
+        ]
+    else:
+        return geometry
+    return {"type": geometry["type"], "coordinates": coordinates}
+
+
+def simplify_geojson(data: dict, precision: int = 2) -> dict:
+    """Quantize coordinates to ``precision`` decimals and strip properties."""
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {
+                    k: v for k, v in (f.get("properties") or {}).items() if k in KEPT_PROPERTIES
+                },
+                "geometry": _quantize_geometry(f.get("geometry"), precision)
+            }
+            for f in data.get("features", [])
+        ]
+    }
+
+
+@dataclass
+class GeoAsset:
+    """A JSON body with its pre-compressed encodings and ETag."""
+    bodies: Dict[str, bytes] = field(default_factory=dict)  # encoding -> body
+    etag: str = ""
+
+    @property
+    def version(self) -> str:
+        """Content hash used in the asset's URL."""
+        return self.etag.strip('"')
+
+    @classmethod
+    def build(cls, data: dict) -> "GeoAsset":
+        raw = json.dumps(data, separators=(",", ":")).encode()
+        bodies = {"identity": raw, "gzip": gzip.compress(raw, compresslevel=9, mtime=0)}
+        if brotli:
+            bodies["br"] = brotli.compress(raw, quality=11)
+        return cls(bodies=bodies, etag=f'"{hashlib.sha256(raw).hexdigest()[:16]}"')
+
+    def negotiate(self, accept_encoding: str) -> str:
+        """Pick the best available encoding allowed by Accept-Encoding."""
+        accepted = set()
+        for part in accept_encoding.split(","):
+            name, _, params = part.strip().partition(";")
+            if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+                continue
+            accepted.add(name.strip().lower())
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+
+class GeoStore:
+    """Country geometry variants built once from the vendored dataset."""
+
+    def __init__(self, path: str, precision: int = 2):
+        self.path = path
+        self.precision = precision
+        self.assets: Dict[str, GeoAsset] = {}
+        self.failed = False
+
+    def load(self) -> bool:
+        if self.assets:
+            return True
+        if self.failed:
+            return False
+        if not os.path.exists(self.path):
+            logger.warning(f"Country geometry not found at {self.path}")
+            return False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.assets = {
+                "full": GeoAsset.build(data),
+                "simplified": GeoAsset.build(simplify_geojson(data, self.precision))
+            }
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            # Unreadable or malformed dataset: serve 503s rather than fail startup
+            logger.error(f"Could not load country geometry from {self.path}: {e}")
+            self.failed = True
+            return False
+        sizes = {name: len(a.bodies["identity"]) for name, a in self.assets.items()}
+        logger.info(f"Country geometry loaded: {sizes}")
+        return True
+
+    def get(self, variant: str) -> Optional[GeoAsset]:
+        if not self.load():
+            return None
+        return self.assets.get(variant)
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger("infomap-api")
+
+
+class LoopMonitor:
+    """Measures event-loop lag and, in debug mode, catches blocking calls.
+
+    A heartbeat task sleeps for ``interval`` seconds and records how late it
+    wakes up. In debug mode a watchdog thread also notices when the heartbeat
+    stops for longer than ``threshold`` and captures the loop thread's stack
+    and the request being served at that moment.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        threshold: float = 0.1,
+        debug: bool = False,
+        max_samples: int = 120,
+        max_incidents: int = 50,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.debug = debug
+        self.samples = deque(maxlen=max_samples)
+        self.incidents = deque(maxlen=max_incidents)
+        self.max_lag = 0.0
+        self.routes = {}  # task -> "METHOD /path" being served (debug mode)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._last_tick = time.monotonic()
+        self._ticks = 0
+
+    async def start(self):
+        if self._task:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._run())
+        if self.debug:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+        logger.info(f"Event loop monitor started (debug={self.debug})")
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._watchdog:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _run(self):
+        while True:
+            started = self._loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, self._loop.time() - started - self.interval)
+            self._last_tick = time.monotonic()
+            self._ticks += 1
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                logger.warning(f"Event loop lag {lag * 1000:.0f}ms")
+
+    def _watch(self):
+        reported_tick = -1
+        while not self._stopped.wait(self.threshold / 2):
+            tick = self._ticks
+            stalled = time.monotonic() - self._last_tick - self.interval
+            if stalled > self.threshold and tick != reported_tick:
+                reported_tick = tick
+                self._capture(stalled)
+
+    def _capture(self, stalled: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame else ""
+        try:
+            route = self.routes.get(asyncio.current_task(self._loop))
+        except RuntimeError:
+            route = None
+        self.incidents.append({
+            "detected_at": datetime.utcnow().isoformat(),
+            "blocked_ms": round(stalled * 1000),
+            "route": route,
+            "stack": stack
+        })
+        logger.warning(f"Event loop blocked for {stalled * 1000:.0f}ms+ (route: {route})\n{stack}")
+
+    def snapshot(self) -> dict:
+        samples = sorted(self.samples)
+        p95 = samples[int(len(samples) * 0.95) - 1] if samples else 0.0
+        return {
+            "debug": self.debug,
+            "threshold_ms": round(self.threshold * 1000),
+            "lag_ms": {
+                "last": round(self.samples[-1] * 1000, 1) if samples else 0.0,
+                "avg": round(sum(samples) / len(samples) * 1000, 1) if samples else 0.0,
+                "p95": round(p95 * 1000, 1),
+                "max": round(self.max_lag * 1000, 1)
+            },
+            "incidents": list(self.incidents)
+        }
+
+
+class LoopMonitorMiddleware:
+    """ASGI middleware recording which request each task is serving."""
+
+    def __init__(self, app, monitor: LoopMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.monitor.debug:
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        self.monitor.routes[task] = f"{scope['method']} {scope['path']}"
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.routes.pop(task, None)
@@ -1,4 +1,7 @@
 import os
+import asyncio
+import base64
+import uuid
 import httpx
 import json
 import time
@@ -14,8 +17,8 @@ def get_paris_now():
 def get_paris_today():
     return get_paris_now().strftime('%Y-%m-%d')
 
-from fastapi import FastAPI, HTTPException, Request, Depends
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, HTTPException, Request, Response, Depends, Query
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
@@ -25,8 +28,17 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
-from database import get_db_service
-from models import User, DailyQuota, QueryHistory
+from database import get_db_service, UsageEvent, LeaseRelease, cache_key
+from coherence import UserCache, RefreshFeed
+from ttl_policy import TTLPolicy, parse_baselines
+from models import User, DailyQuota, QueryHistory, GlobalCache
+from write_queue import WriteQueue
+from admission import AdmissionGate, AdmissionRejected, Priority
+from user_bulk import FORMATS, MEDIA_TYPES, export_lines, iter_lines, parse_import
+from geo import GeoStore
+from watch_hub import WatchHub
+from loop_monitor import LoopMonitor, LoopMonitorMiddleware
+from news_providers import ModelRouter, PerplexityProvider, FakeProvider, parse_model_tiers
 
 # Configure logging
 logging.basicConfig(
@@ -54,7 +66,10 @@ if not SESSION_SECRET_KEY:
         SESSION_SECRET_KEY = "dev-only-insecure-key-do-not-use-in-production"
         logger.warning("⚠️  Using insecure default SESSION_SECRET_KEY - NOT for production!")
 
-# Initialize Limiter
+# Worker processes started by uvicorn; per-process limits below are derived from it
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+# Initialize Limiter (in-memory, so each worker counts requests separately)
 limiter = Limiter(key_func=get_remote_address)
 app = FastAPI(title="InfoMap API Pro")
 app.state.limiter = limiter
@@ -75,7 +90,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
+)
+
+# Event-loop lag monitor (debug mode also captures blocking call stacks)
+loop_monitor = LoopMonitor(
+    interval=float(os.getenv("LOOP_MONITOR_INTERVAL", "0.5")),
+    threshold=float(os.getenv("LOOP_MONITOR_THRESHOLD", "0.1")),
+    debug=os.getenv("LOOP_MONITOR_DEBUG", "false").lower() == "true",
 )
+app.add_middleware(LoopMonitorMiddleware, monitor=loop_monitor)
 
 # OAuth Setup
 oauth = OAuth()
@@ -89,25 +113,91 @@ oauth.register(
     }
 )
 
-# Database Service
-db_service = get_db_service(DATABASE_URL)
+# Database Service (cache TTLs adapt per key, starting from these baselines)
+ttl_policy = TTLPolicy(
+    parse_baselines(os.getenv("CACHE_TTL_BASELINES", "")),
+    min_ttl=int(os.getenv("CACHE_TTL_MIN", "900")),
+    max_ttl=int(os.getenv("CACHE_TTL_MAX", "86400")),
+    change_threshold=float(os.getenv("CACHE_TTL_CHANGE_THRESHOLD", "0.5")),
+)
+db_service = get_db_service(DATABASE_URL, ttl_policy)
+
+TIME_FILTERS = ["24h", "7d"]
+TOPICS = ["General", "Economy", "Politics", "Tech", "Military"]
 
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
 PERPLEXITY_URL = "https://api.perplexity.ai/chat/completions"
 FRONTEND_URL = os.getenv("FRONTEND_URL", "https://infomap.ovh")
 
+# Per-worker user cache, invalidated across workers through the database
+user_cache = UserCache(db_service, check_interval=float(os.getenv("USER_CACHE_CHECK_INTERVAL", "1.0")))
+
+# Single-flight leases on cache keys, shared by all workers
+CACHE_LEASE_TTL = float(os.getenv("CACHE_LEASE_TTL", "45"))
+CACHE_LEASE_POLL = 0.5
+
+# Push channel for watched cache keys, fed by cache rows written by any worker
+watch_hub = WatchHub()
+refresh_feed = RefreshFeed(
+    db_service,
+    watch_hub.publish,
+    interval=float(os.getenv("WATCH_FEED_INTERVAL", "1.0")),
+    active=lambda: watch_hub.stats()["connections"] > 0
+)
+
+# Country geometry served from the vendored Natural Earth dataset
+GEO_DATA_PATH = os.getenv(
+    "GEO_DATA_PATH", os.path.join(BASE_DIR, "data", "ne_110m_admin_0_countries.geojson")
+)
+geo_store = GeoStore(GEO_DATA_PATH)
+
 # Global HTTPX AsyncClient for better connection pooling
 http_client: Optional[httpx.AsyncClient] = None
 
+# Background writer for cache and history rows (flushed in batches)
+write_queue = WriteQueue(
+    db_service.write_batch,
+    max_size=int(os.getenv("WRITE_QUEUE_MAX_SIZE", "1000")),
+    flush_interval=float(os.getenv("WRITE_QUEUE_FLUSH_INTERVAL", "0.5")),
+)
+
+# Admission control for upstream (Perplexity) calls; the configured limits are
+# totals, split evenly across worker processes (at least 1 per worker)
+upstream_gate = AdmissionGate(
+    max_concurrent=max(1, int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "4")) // WEB_CONCURRENCY),
+    max_queue=max(1, int(os.getenv("UPSTREAM_MAX_QUEUE", "16")) // WEB_CONCURRENCY),
+    max_wait=float(os.getenv("UPSTREAM_MAX_WAIT", "10")),
+    retry_after=int(os.getenv("UPSTREAM_RETRY_AFTER", "5")),
+)
+
+# Model routing for news generation ("fake" runs fully offline)
+NEWS_PROVIDER = os.getenv("NEWS_PROVIDER", "perplexity")
+NEWS_LATENCY_BUDGET = float(os.getenv("NEWS_LATENCY_BUDGET", "25"))
+if NEWS_PROVIDER == "fake":
+    news_provider = FakeProvider()
+else:
+    news_provider = PerplexityProvider(PERPLEXITY_API_KEY, PERPLEXITY_URL, lambda: http_client)
+model_router = ModelRouter(
+    parse_model_tiers(os.getenv("NEWS_MODELS", "sonar-pro:12,sonar:5"), news_provider),
+    queue_threshold=int(os.getenv("NEWS_FAST_QUEUE_DEPTH", "4")),
+)
+
 @app.on_event("startup")
 async def startup_event():
     global http_client
     http_client = httpx.AsyncClient(timeout=30.0)
     logger.info("Global HTTPX AsyncClient initialized")
+    geo_store.load()
+    await write_queue.start()
+    await loop_monitor.start()
+    await refresh_feed.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     global http_client
+    await refresh_feed.stop()
+    await loop_monitor.stop()
+    await write_queue.stop()
     if http_client:
         await http_client.aclose()
         logger.info("Global HTTPX AsyncClient closed")
@@ -119,7 +209,7 @@ async def get_current_user(request: Request):
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    db_user = db_service.get_or_create_user(user['email'])
+    db_user = user_cache.get_or_create(user['email'])
     if not db_user.is_active:
         request.session.pop('user', None)
         raise HTTPException(status_code=403, detail="User not authorized")
@@ -127,7 +217,7 @@ async def get_current_user(request: Request):
     return user
 
 async def get_admin_user(user: dict = Depends(get_current_user)):
-    db_user = db_service.get_or_create_user(user['email'])
+    db_user = user_cache.get_or_create(user['email'])
     if not db_user.is_admin:
         logger.warning(f"Unauthorized admin access attempt by {user['email']}")
         raise HTTPException(status_code=403, detail="Admin access required")
@@ -147,6 +237,11 @@ class UserCreate(BaseModel):
     is_active: bool = True
     max_daily_quota: int = 5
 
+class WatchCreate(BaseModel):
+    country: str
+    topic: str = "General"
+    time_filter: str = "24h"
+
 # --- Auth Routes ---
 
 @app.get("/login")
@@ -171,7 +266,7 @@ async def auth(request: Request):
         
         if userinfo:
             email = userinfo.get("email")
-            db_user = db_service.get_or_create_user(email)
+            db_user = user_cache.get_or_create(email)
             
             if not db_user.is_active:
                 logger.warning(f"Unauthorized login attempt: {email}")
@@ -200,7 +295,7 @@ async def get_me(request: Request):
     if not user:
         return {"authenticated": False}
     
-    db_user = db_service.get_or_create_user(user['email'])
+    db_user = user_cache.get_or_create(user['email'])
     return {
         "authenticated": True,
         "user": user,
@@ -211,21 +306,69 @@ async def get_me(request: Request):
 
 @app.get("/admin/users")
 async def list_users(admin: User = Depends(get_admin_user)):
-    from sqlmodel import Session, select
     today = get_paris_today()
-    with Session(db_service.engine) as session:
-        statement = select(User)
-        users = session.exec(statement).all()
-        
-        # Enrich users with today's query count
-        enriched_users = []
-        for user in users:
-            count = db_service.get_daily_count(user.id, today)
-            user_data = user.dict()
-            user_data['today_count'] = count
-            enriched_users.append(user_data)
-        
-        return enriched_users
+    # Users are enriched with today's query count in one joined query per chunk
+    return [
+        {**user.model_dump(), "today_count": count}
+        for user, count in db_service.iter_users_with_quota(today)
+    ]
+
+@app.get("/admin/users/export")
+async def export_users(format: str = "csv", admin: User = Depends(get_admin_user)):
+    """Stream all users with their quota as CSV or NDJSON"""
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+    lines = export_lines(db_service.iter_users_with_quota(get_paris_today()), format)
+    return StreamingResponse(
+        lines,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'}
+    )
+
+USER_IMPORT_CHUNK_SIZE = 500
+
+@app.post("/admin/users/import")
+async def import_users(request: Request, format: str = "csv", admin: User = Depends(get_admin_user)):
+    """Bulk create/update users from a CSV or NDJSON body.
+
+    Rows are validated one by one and upserted in chunked transactions;
+    invalid rows, and rows targeting the caller or an admin account, are
+    skipped and reported with their row number.
+    """
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+
+    created = updated = 0
+    errors = []
+    chunk = []
+    row_numbers = {}
+
+    async def flush_chunk():
+        nonlocal created, updated
+        c, u, skipped = await asyncio.to_thread(db_service.upsert_users, chunk, (admin.email,))
+        created += c
+        updated += u
+        for email in skipped:
+            errors.append({"row": row_numbers[email], "error": f"cannot modify admin account: {email!r}"})
+        chunk.clear()
+        row_numbers.clear()
+
+    async for row_number, row, error in parse_import(iter_lines(request.stream()), format):
+        if error:
+            errors.append({"row": row_number, "error": error})
+            continue
+        chunk.append(row)
+        row_numbers[row["email"]] = row_number
+        if len(chunk) >= USER_IMPORT_CHUNK_SIZE:
+            await flush_chunk()
+    if chunk:
+        await flush_chunk()
+    errors.sort(key=lambda e: e["row"])
+    if created or updated:
+        user_cache.invalidate()
+
+    logger.info(f"Admin {admin.email} imported users: {created} created, {updated} updated, {len(errors)} errors")
+    return {"status": "success", "created": created, "updated": updated, "errors": errors}
 
 @app.post("/admin/quota")
 async def update_user_quota(update: QuotaUpdate, admin: User = Depends(get_admin_user)):
@@ -239,6 +382,7 @@ async def update_user_quota(update: QuotaUpdate, admin: User = Depends(get_admin
         user.max_daily_quota = update.max_daily_quota
         session.add(user)
         session.commit()
+        user_cache.invalidate()
         logger.info(f"Admin {admin.email} updated quota for {update.email} to {update.max_daily_quota}")
         return {"status": "success", "email": update.email, "new_quota": user.max_daily_quota}
 
@@ -258,6 +402,7 @@ async def create_user(user_data: UserCreate, admin: User = Depends(get_admin_use
         )
         session.add(new_user)
         session.commit()
+        user_cache.invalidate()
         logger.info(f"Admin {admin.email} created user {user_data.email}")
         return {"status": "success", "user": new_user}
 
@@ -276,6 +421,7 @@ async def toggle_user_status(update: UserStatusUpdate, admin: User = Depends(get
         user.is_active = update.is_active
         session.add(user)
         session.commit()
+        user_cache.invalidate()
         logger.info(f"Admin {admin.email} set status of {update.email} to {update.is_active}")
         return {"status": "success", "email": update.email, "is_active": user.is_active}
 
@@ -291,17 +437,39 @@ async def delete_user(email: str, admin: User = Depends(get_admin_user)):
         if user.email == admin.email:
              raise HTTPException(status_code=400, detail="Cannot delete yourself")
 
+        user_id = user.id
         session.delete(user)
         session.commit()
+        user_cache.invalidate()
+        db_service.remove_search_entries("history", user_id=user_id)
         logger.info(f"Admin {admin.email} deleted user {email}")
         return {"status": "success", "deleted": email}
 
+@app.get("/admin/analytics")
+async def get_analytics(days: int = Query(7, ge=1, le=90), admin: User = Depends(get_admin_user)):
+    """Usage summary over the last `days` days, read from the rollup tables"""
+    from datetime import timedelta
+    end = get_paris_now()
+    start = end - timedelta(days=days - 1)
+    analytics = db_service.get_usage_analytics(start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+    return {"days": days, **analytics}
+
+@app.get("/admin/models")
+async def get_model_stats(admin: User = Depends(get_admin_user)):
+    """Per-model latency and success rates used for routing"""
+    return {"provider": news_provider.name, "models": model_router.stats()}
+
+@app.get("/admin/loop")
+async def get_loop_stats(admin: User = Depends(get_admin_user)):
+    """Event-loop lag and captured blocking-call incidents"""
+    return loop_monitor.snapshot()
+
 # --- News & Quota Routes ---
 
 @app.get("/quota")
 async def check_quota(user: dict = Depends(get_current_user)):
     today = get_paris_today()
-    db_user = db_service.get_or_create_user(user['email'])
+    db_user = user_cache.get_or_create(user['email'])
     count = db_service.get_daily_count(db_user.id, today)
     return {
         "date": today,
@@ -311,44 +479,78 @@ async def check_quota(user: dict = Depends(get_current_user)):
 
 # --- History Routes ---
 
+def encode_history_cursor(created_at: datetime, history_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{history_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_history_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, history_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(history_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def serialize_history(h, summary: bool = False) -> dict:
+    item = {
+        "id": h.id,
+        "country": h.country,
+        "time_filter": h.time_filter,
+        "topic": h.topic,
+        "timestamp": h.created_at.isoformat()
+    }
+    if not summary:
+        item["news"] = json.loads(h.news_json)
+        item["stats"] = json.loads(h.stats_json) if h.stats_json else None
+    return item
+
 @app.get("/history")
-async def get_history(user: dict = Depends(get_current_user)):
-    """Get user's query history (last 20 items, max 4h old)"""
-    from sqlmodel import Session, select
+async def get_history(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    fields: str = "full",
+    user: dict = Depends(get_current_user)
+):
+    """Get user's query history (newest first, max 4h old).
+
+    Results are paginated by cursor: when more items exist, the
+    ``X-Next-Cursor`` response header holds the value to pass as ``cursor``.
+    ``fields=summary`` returns metadata only, without news and stats.
+    """
     from datetime import timedelta
-    
-    db_user = db_service.get_or_create_user(user['email'])
+
+    if fields not in ["full", "summary"]:
+        raise HTTPException(status_code=400, detail="fields must be 'full' or 'summary'")
+    summary = fields == "summary"
+    before = decode_history_cursor(cursor) if cursor else None
+
+    db_user = user_cache.get_or_create(user['email'])
     cutoff = datetime.utcnow() - timedelta(hours=4)
-    
-    with Session(db_service.engine) as session:
-        statement = (
-            select(QueryHistory)
-            .where(QueryHistory.user_id == db_user.id)
-            .where(QueryHistory.created_at >= cutoff)
-            .order_by(QueryHistory.created_at.desc())
-            .limit(20)
-        )
-        history = session.exec(statement).all()
-        
-        return [
-            {
-                "id": h.id,
-                "country": h.country,
-                "time_filter": h.time_filter,
-                "topic": h.topic,
-                "news": json.loads(h.news_json),
-                "stats": json.loads(h.stats_json) if h.stats_json else None,
-                "timestamp": h.created_at.isoformat()
-            }
-            for h in history
-        ]
+
+    rows = db_service.get_history_page(db_user.id, cutoff, limit + 1, before, summary)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_history_cursor(last.created_at, last.id)
+
+    return [serialize_history(h, summary) for h in rows]
+
+@app.get("/history/{history_id}")
+async def get_history_item(history_id: int, user: dict = Depends(get_current_user)):
+    """Get a single history item with its full payload"""
+    db_user = user_cache.get_or_create(user['email'])
+    item = db_service.get_history_item(db_user.id, history_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="History item not found")
+    return serialize_history(item)
 
 @app.delete("/history/{history_id}")
 async def delete_history_item(history_id: int, user: dict = Depends(get_current_user)):
     """Delete a specific history item"""
     from sqlmodel import Session, select
     
-    db_user = db_service.get_or_create_user(user['email'])
+    db_user = user_cache.get_or_create(user['email'])
     
     with Session(db_service.engine) as session:
         statement = select(QueryHistory).where(
@@ -361,8 +563,154 @@ async def delete_history_item(history_id: int, user: dict = Depends(get_current_
         
         session.delete(item)
         session.commit()
+        db_service.remove_search_entries("history", ref_id=history_id)
         return {"status": "success", "deleted_id": history_id}
 
+GEO_VARIANTS = ["full", "simplified"]
+
+@app.get("/geo/countries")
+async def get_country_geometry_index():
+    """File names of the current country geometry variants.
+
+    The geometry itself is served under content-hashed names that can be
+    cached forever; this small index is revalidated on every load instead.
+    """
+    assets = {variant: geo_store.get(variant) for variant in GEO_VARIANTS}
+    if not all(assets.values()):
+        raise HTTPException(status_code=503, detail="Country geometry unavailable")
+    return Response(
+        json.dumps({variant: f"{variant}.{asset.version}.json" for variant, asset in assets.items()}),
+        media_type="application/json",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@app.get("/geo/countries/{filename}")
+async def get_country_geometry(request: Request, filename: str):
+    """Country polygons, pre-compressed at startup (gzip, and brotli if installed).
+
+    The name carries the content hash ("simplified.<hash>.json"), so the body
+    never changes under a URL and is served with immutable caching.
+    """
+    variant = filename.split(".", 1)[0]
+    if variant not in GEO_VARIANTS:
+        raise HTTPException(status_code=400, detail="variant must be 'full' or 'simplified'")
+    asset = geo_store.get(variant)
+    if not asset:
+        raise HTTPException(status_code=503, detail="Country geometry unavailable")
+    if filename != f"{variant}.{asset.version}.json":
+        raise HTTPException(status_code=404, detail="Unknown country geometry version")
+
+    headers = {
+        "ETag": asset.etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Vary": "Accept-Encoding"
+    }
+    if request.headers.get("if-none-match") == asset.etag:
+        return Response(status_code=304, headers=headers)
+
+    encoding = asset.negotiate(request.headers.get("accept-encoding", ""))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(asset.bodies[encoding], media_type="application/json", headers=headers)
+
+# --- Search Routes ---
+
+@app.get("/search")
+async def search_headlines(
+    q: str,
+    scope: str = "all",
+    days: Optional[int] = Query(None, ge=1, le=365),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    user: dict = Depends(get_current_user)
+):
+    """Full-text search over cached headlines and the user's own history.
+
+    Results are ranked by relevance (bm25); `days` restricts them to rows
+    written in the last N days.
+    """
+    from datetime import timedelta
+
+    kinds = {"all": ("cache", "history"), "cache": ("cache",), "history": ("history",)}.get(scope)
+    if not kinds:
+        raise HTTPException(status_code=400, detail="scope must be 'all', 'cache' or 'history'")
+    since = (datetime.utcnow() - timedelta(days=days)).isoformat() if days else None
+
+    db_user = user_cache.get_or_create(user['email'])
+    results = db_service.search_headlines(
+        q, db_user.id, kinds=kinds, since=since, limit=limit, offset=offset
+    )
+    return {
+        "query": q,
+        "results": results,
+        "next_offset": offset + limit if len(results) == limit else None
+    }
+
+# --- Watchlist Routes ---
+
+WATCHLIST_MAX_ITEMS = 50
+WATCH_HEARTBEAT_SECONDS = 15
+
+def watch_keys(items) -> list:
+    return [(w.country, w.topic, w.time_filter) for w in items]
+
+def serialize_watch(w) -> dict:
+    return {"id": w.id, "country": w.country, "topic": w.topic, "time_filter": w.time_filter}
+
+@app.get("/watchlist")
+async def get_watchlist(user: dict = Depends(get_current_user)):
+    db_user = user_cache.get_or_create(user['email'])
+    return [serialize_watch(w) for w in db_service.get_watchlist(db_user.id)]
+
+@app.post("/watchlist")
+async def add_watch(watch: WatchCreate, user: dict = Depends(get_current_user)):
+    if not watch.country or watch.country == "undefined":
+        raise HTTPException(status_code=400, detail="Invalid country name.")
+    if watch.topic not in TOPICS or watch.time_filter not in TIME_FILTERS:
+        raise HTTPException(status_code=400, detail="Invalid topic or time filter.")
+
+    db_user = user_cache.get_or_create(user['email'])
+    items = db_service.get_watchlist(db_user.id)
+    if len(items) >= WATCHLIST_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Watchlist is limited to {WATCHLIST_MAX_ITEMS} items.")
+
+    item = db_service.add_watch(db_user.id, watch.country, watch.topic, watch.time_filter)
+    watch_hub.update_keys(db_user.id, watch_keys(db_service.get_watchlist(db_user.id)))
+    return serialize_watch(item)
+
+@app.delete("/watchlist/{watch_id}")
+async def remove_watch(watch_id: int, user: dict = Depends(get_current_user)):
+    db_user = user_cache.get_or_create(user['email'])
+    if not db_service.remove_watch(db_user.id, watch_id):
+        raise HTTPException(status_code=404, detail="Watchlist item not found")
+    watch_hub.update_keys(db_user.id, watch_keys(db_service.get_watchlist(db_user.id)))
+    return {"status": "success", "deleted_id": watch_id}
+
+@app.get("/watchlist/stream")
+async def stream_watchlist(user: dict = Depends(get_current_user)):
+    """Server-Sent Events: one 'refresh' event per cache refresh of a watched key"""
+    db_user = user_cache.get_or_create(user['email'])
+    queue = watch_hub.connect(db_user.id, watch_keys(db_service.get_watchlist(db_user.id)))
+
+    async def events():
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), WATCH_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: refresh\ndata: {json.dumps(event)}\n\n"
+        finally:
+            watch_hub.disconnect(db_user.id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok", "timestamp": time.time()}
@@ -399,30 +747,93 @@ async def get_country_news(
     
     today = get_paris_today()
     email = user['email']
-    db_user = db_service.get_or_create_user(email)
+    db_user = user_cache.get_or_create(email)
 
-    if time_filter not in ["24h", "7d"]:
+    if time_filter not in TIME_FILTERS:
         time_filter = "24h"
-    if topic not in ["General", "Economy", "Politics", "Tech", "Military"]:
+    if topic not in TOPICS:
         topic = "General"
 
     # 1. Check Global Cache first
     cached = db_service.get_cached_news(country, time_filter, topic)
     if cached:
-        logger.info(f"Cache HIT for {country}/{topic}")
-        # Still need to provide quota info to frontend
-        current_count = db_service.get_daily_count(db_user.id, today)
-        return {
-            "country": country, "time_filter": time_filter, "topic": topic,
-            "news": json.loads(cached.news_json), "trends": [], 
-            "stats": json.loads(cached.stats_json) if cached.stats_json else None,
-            "from_cache": True, "quota": current_count
-        }
+        return await cached_news_response(cached, db_user, today)
+
+    # 2. Single-flight: one request across all workers refreshes a key, others wait for it
+    key = cache_key(country, time_filter, topic)
+    lease_owner = uuid.uuid4().hex
+    if db_service.acquire_lease(key, lease_owner, CACHE_LEASE_TTL):
+        # The previous holder may have just finished: re-check before calling upstream
+        cached = db_service.get_cached_news(country, time_filter, topic)
+    else:
+        cached = await wait_for_refresh(country, time_filter, topic, key, lease_owner)
+    if cached:
+        db_service.release_lease(key, lease_owner)
+        return await cached_news_response(cached, db_user, today)
 
-    # 2. Check and Reserve Quota (BEFORE API call)
+    try:
+        # 3. Wait for an upstream slot (admins first), shedding load when saturated
+        priority = Priority.ADMIN if db_user.is_admin else Priority.INTERACTIVE
+        try:
+            await upstream_gate.acquire(priority)
+        except AdmissionRejected as e:
+            logger.warning(f"Upstream busy, rejecting request from {email}")
+            raise HTTPException(
+                status_code=503,
+                detail="News service is busy, please retry shortly.",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+
+        # 4. Fetch fresh news while holding the slot; the lease is released with the cache write
+        try:
+            return await fetch_fresh_news(
+                country, time_filter, topic, db_user, today, LeaseRelease(key, lease_owner)
+            )
+        finally:
+            upstream_gate.release()
+    except BaseException:
+        db_service.release_lease(key, lease_owner)
+        raise
+
+async def cached_news_response(cached: GlobalCache, db_user: User, today: str):
+    logger.info(f"Cache HIT for {cached.country}/{cached.topic}")
+    await write_queue.submit(
+        UsageEvent(today, db_user.id, cached.country, cached.topic, cache_hit=True)
+    )
+    # Still need to provide quota info to frontend
+    current_count = db_service.get_daily_count(db_user.id, today)
+    return {
+        "country": cached.country, "time_filter": cached.time_filter, "topic": cached.topic,
+        "news": json.loads(cached.news_json), "trends": [],
+        "stats": json.loads(cached.stats_json) if cached.stats_json else None,
+        "from_cache": True, "quota": current_count
+    }
+
+async def wait_for_refresh(country: str, time_filter: str, topic: str, key: str, lease_owner: str):
+    """Wait for the lease holder's cache entry.
+
+    Returns the entry, or None once this request took the lease over
+    (holder failed or expired) or the wait timed out.
+    """
+    deadline = time.monotonic() + CACHE_LEASE_TTL
+    while time.monotonic() < deadline:
+        await asyncio.sleep(CACHE_LEASE_POLL)
+        cached = db_service.get_cached_news(country, time_filter, topic)
+        if cached:
+            return cached
+        if db_service.acquire_lease(key, lease_owner, CACHE_LEASE_TTL):
+            return db_service.get_cached_news(country, time_filter, topic)
+    return None
+
+async def fetch_fresh_news(
+    country: str, time_filter: str, topic: str, db_user: User, today: str,
+    lease_release: LeaseRelease
+):
+    """Reserve quota, call Perplexity and queue the cache/history writes"""
+    # Check and Reserve Quota (BEFORE API call)
     new_count = db_service.reserve_quota(db_user.id, today, db_user.max_daily_quota)
     if new_count is None:
-        logger.warning(f"Quota EXCEEDED for {email}")
+        logger.warning(f"Quota EXCEEDED for {db_user.email}")
         raise HTTPException(status_code=429, detail="Daily API quota reached.")
 
     time_str = "in the last 24 hours" if time_filter == "24h" else "strictly since last Monday (this week)"
@@ -438,9 +849,10 @@ async def get_country_news(
     user_prompt = templates[topic]
     stats_task = get_country_stats(country)
     
-    if not PERPLEXITY_API_KEY:
+    if not PERPLEXITY_API_KEY and NEWS_PROVIDER != "fake":
         stats = await stats_task
         mock_data = [{"titre": f"[{topic}] News in {country}", "date": today, "source_url": "#"}] * 5
+        await write_queue.submit(UsageEvent(today, db_user.id, country, topic), lease_release)
         return {
             "country": country, "time_filter": time_filter, "topic": topic,
             "news": mock_data, "trends": [], "stats": stats, "from_cache": False,
@@ -453,49 +865,53 @@ async def get_country_news(
         "NO introductory text, just the JSON."
     )
     
-    headers = {"Authorization": f"Bearer {PERPLEXITY_API_KEY}", "Content-Type": "application/json"}
-    payload = {
-        "model": "sonar-pro",
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
-        "temperature": 0.1
-    }
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+    def parse_news(ai_content: str) -> dict:
+        clean_content = ai_content.replace("```json", "").replace("```", "").strip()
+        return json.loads(clean_content)
 
-    global http_client
     try:
-        response = await http_client.post(PERPLEXITY_URL, json=payload, headers=headers)
-        response.raise_for_status()
-        data = response.json()
+        routed = await model_router.generate(
+            messages,
+            budget=NEWS_LATENCY_BUDGET,
+            queue_depth=upstream_gate.stats()["queued"],
+            parse=parse_news
+        )
         stats = await stats_task
-        ai_content = data["choices"][0]["message"]["content"]
-        
-        clean_content = ai_content.replace("```json", "").replace("```", "").strip()
-        json_data = json.loads(clean_content)
+        json_data = routed.value
         news_list = json_data.get("news", [])
         
-        # 3. Save to Global Cache
-        db_service.set_cached_news(
-            country, time_filter, topic, 
-            json.dumps(news_list), 
-            json.dumps(stats) if stats else None
-        )
-        
-        # 4. Save to User History
-        from sqlmodel import Session
-        with Session(db_service.engine) as session:
-            history_item = QueryHistory(
+        # Queue Global Cache and User History writes (flushed in background)
+        news_json = json.dumps(news_list)
+        stats_json = json.dumps(stats) if stats else None
+        await write_queue.submit(
+            GlobalCache(
+                country=country,
+                time_filter=time_filter,
+                topic=topic,
+                news_json=news_json,
+                stats_json=stats_json
+            ),
+            QueryHistory(
                 user_id=db_user.id,
                 country=country,
                 time_filter=time_filter,
                 topic=topic,
-                news_json=json.dumps(news_list),
-                stats_json=json.dumps(stats) if stats else None
-            )
-            session.add(history_item)
-            session.commit()
-            logger.info(f"History saved for {email}: {country}/{topic}")
+                news_json=news_json,
+                stats_json=stats_json
+            ),
+            UsageEvent(
+                today, db_user.id, country, topic,
+                upstream_call=True,
+                upstream_tokens=routed.tokens
+            ),
+            lease_release
+        )
+        logger.info(f"History queued for {db_user.email}: {country}/{topic} ({routed.model}, {routed.elapsed:.1f}s)")
         
         return {
             "country": country, "time_filter": time_filter, "topic": topic,
@@ -1,5 +1,6 @@
 from typing import Optional
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index, UniqueConstraint
 from datetime import date, datetime
 
 class User(SQLModel, table=True):
@@ -19,8 +20,21 @@ class User(SQLModel, table=True):
         back_populates="user",
         sa_relationship_kwargs={"cascade": "all, delete-orphan"}
     )
+    # Relationship to watchlist
+    watchlist: list["Watchlist"] = Relationship(
+        back_populates="user",
+        sa_relationship_kwargs={"cascade": "all, delete-orphan"}
+    )
+    # Relationship to usage rollups
+    usage: list["UserUsageRollup"] = Relationship(
+        back_populates="user",
+        sa_relationship_kwargs={"cascade": "all, delete-orphan"}
+    )
 
 class DailyQuota(SQLModel, table=True):
+    # Backs per-user quota lookups for a given day
+    __table_args__ = (Index("ix_dailyquota_user_date", "user_id", "date"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     date: str = Field(index=True)  # Format YYYY-MM-DD
@@ -30,6 +44,11 @@ class DailyQuota(SQLModel, table=True):
     user: Optional[User] = Relationship(back_populates="quotas")
 
 class QueryHistory(SQLModel, table=True):
+    # Backs per-user history listing ordered by recency
+    __table_args__ = (
+        Index("ix_queryhistory_user_created", "user_id", "created_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id", index=True)
     country: str
@@ -43,6 +62,11 @@ class QueryHistory(SQLModel, table=True):
     user: Optional[User] = Relationship(back_populates="history")
 
 class GlobalCache(SQLModel, table=True):
+    # Backs the freshest-entry lookup for a (country, time_filter, topic) key
+    __table_args__ = (
+        Index("ix_globalcache_key_created", "country", "time_filter", "topic", "created_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     country: str = Field(index=True)
     time_filter: str = Field(index=True)
@@ -50,3 +74,65 @@ class GlobalCache(SQLModel, table=True):
     news_json: str
     stats_json: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+class Watchlist(SQLModel, table=True):
+    """A (country, topic, time_filter) key a user wants refreshes pushed for."""
+    __table_args__ = (UniqueConstraint("user_id", "country", "topic", "time_filter"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    country: str
+    topic: str
+    time_filter: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    # Relationship to user
+    user: Optional[User] = Relationship(back_populates="watchlist")
+
+class UsageRollup(SQLModel, table=True):
+    """Request counters per day x country x topic, maintained incrementally."""
+    __table_args__ = (UniqueConstraint("date", "country", "topic"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    date: str = Field(index=True)  # Format YYYY-MM-DD (Paris time)
+    country: str
+    topic: str
+    requests: int = Field(default=0)
+    cache_hits: int = Field(default=0)
+    upstream_calls: int = Field(default=0)
+    upstream_tokens: int = Field(default=0)
+
+class UserUsageRollup(SQLModel, table=True):
+    """Request counters per day x user, maintained incrementally."""
+    __table_args__ = (UniqueConstraint("date", "user_id"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    date: str = Field(index=True)  # Format YYYY-MM-DD (Paris time)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    requests: int = Field(default=0)
+    cache_hits: int = Field(default=0)
+    upstream_calls: int = Field(default=0)
+    upstream_tokens: int = Field(default=0)
+
+    # Relationship to user
+    user: Optional[User] = Relationship(back_populates="usage")
+
+class CacheLease(SQLModel, table=True):
+    """Marks a cache key as being refreshed, shared by all worker processes."""
+    key: str = Field(primary_key=True)  # "country|time_filter|topic"
+    owner: str
+    expires_at: datetime
+
+class StateVersion(SQLModel, table=True):
+    """Version counters bumped to invalidate per-worker in-memory state."""
+    name: str = Field(primary_key=True)
+    version: int = Field(default=0)
+
+class CacheTTLState(SQLModel, table=True):
+    """Adaptive TTL of a cache key, updated whenever the key is refreshed."""
+    key: str = Field(primary_key=True)  # "country|time_filter|topic"
+    ttl_seconds: int
+    fingerprint: str = Field(default="")  # Space-separated headline digests
+    changes: int = Field(default=0)
+    unchanged: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, List, Optional
+
+import httpx
+
+logger = logging.getLogger("infomap-api")
+
+
+class ProviderError(Exception):
+    """Raised when every routed model failed to produce a usable answer."""
+
+
+@dataclass
+class Completion:
+    content: str
+    tokens: int = 0
+
+
+class PerplexityProvider:
+    """Chat completions against the Perplexity API."""
+    name = "perplexity"
+
+    def __init__(self, api_key: str, url: str, get_client: Callable[[], httpx.AsyncClient]):
+        self.api_key = api_key
+        self.url = url
+        self.get_client = get_client
+
+    async def complete(self, model: str, messages: List[dict]) -> Completion:
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        payload = {"model": model, "messages": messages, "temperature": 0.1}
+        response = await self.get_client().post(self.url, json=payload, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        return Completion(
+            content=data["choices"][0]["message"]["content"],
+            tokens=data.get("usage", {}).get("total_tokens", 0)
+        )
+
+
+class FakeProvider:
+    """Deterministic offline provider: same prompt, same answer.
+
+    ``latency`` (seconds per model) and ``failing`` (model names) let tests
+    exercise routing and fallback without network access.
+    """
+    name = "fake"
+
+    def __init__(self, latency: Optional[dict] = None, failing: tuple = ()):
+        self.latency = latency or {}
+        self.failing = set(failing)
+        self.calls: List[str] = []
+
+    async def complete(self, model: str, messages: List[dict]) -> Completion:
+        self.calls.append(model)
+        await asyncio.sleep(self.latency.get(model, 0))
+        if model in self.failing:
+            raise ProviderError(f"Fake failure for {model}")
+        prompt = messages[-1]["content"]
+        digest = hashlib.sha256(f"{model}:{prompt}".encode()).hexdigest()[:8]
+        news = [
+            {"titre": f"[{model}] Headline {i + 1} ({digest})", "date": "", "source_url": "#"}
+            for i in range(5)
+        ]
+        return Completion(content=json.dumps({"news": news}), tokens=len(prompt.split()))
+
+
+@dataclass
+class ModelStats:
+    """Latency EWMA and recent success rate for one model.
+
+    Health is judged on the last ``window`` outcomes only. An unhealthy model
+    is skipped except for one probe request every ``probe_interval`` seconds;
+    a successful probe starts a fresh window, so a model recovers from a
+    transient outage instead of staying demoted until restart.
+    """
+    latency: float
+    alpha: float = 0.2
+    window: int = 10
+    min_samples: int = 5
+    probe_interval: float = 30.0
+    successes: int = 0
+    failures: int = 0
+    recent: Deque[bool] = field(default_factory=deque)
+    last_failure: float = float("-inf")
+    last_probe: float = float("-inf")
+
+    def record(self, elapsed: float, ok: bool, timed_out: bool = False):
+        # Fast failures (4xx, bad answers) say nothing about latency;
+        # timeouts do, since the model took at least that long
+        if ok or timed_out:
+            self.latency = (1 - self.alpha) * self.latency + self.alpha * elapsed
+        if ok:
+            self.successes += 1
+            if self.unhealthy:
+                self.recent.clear()
+        else:
+            self.failures += 1
+            self.last_failure = time.monotonic()
+        self.recent.append(ok)
+        while len(self.recent) > self.window:
+            self.recent.popleft()
+
+    @property
+    def success_rate(self) -> float:
+        return sum(self.recent) / len(self.recent) if self.recent else 1.0
+
+    @property
+    def unhealthy(self) -> bool:
+        # Only judge a model once it has a few recent samples
+        return len(self.recent) >= self.min_samples and self.success_rate < 0.5
+
+    def take_probe(self, now: float) -> bool:
+        """Whether this request may try the unhealthy model in its usual place."""
+        if now - max(self.last_failure, self.last_probe) < self.probe_interval:
+            return False
+        self.last_probe = now
+        return True
+
+
+@dataclass
+class ModelTier:
+    provider: Any
+    model: str
+    expected_latency: float
+    stats: ModelStats = field(init=False)
+
+    def __post_init__(self):
+        self.stats = ModelStats(latency=self.expected_latency)
+
+
+@dataclass
+class RoutedResult:
+    value: Any
+    model: str
+    tokens: int
+    elapsed: float
+
+
+class ModelRouter:
+    """Routes generation requests across model tiers.
+
+    Tiers are listed best quality first. The best tier whose observed latency
+    fits the budget is tried first; when the upstream queue is deep the
+    fastest tier goes first instead. Failures (including unparseable answers)
+    fall back to the next tier until the budget runs out; each attempt is cut
+    short to leave the fastest remaining tier time to answer.
+    """
+
+    def __init__(self, tiers: List[ModelTier], queue_threshold: int = 4):
+        self.tiers = tiers
+        self.queue_threshold = queue_threshold
+
+    def plan(self, budget: float, queue_depth: int = 0, now: Optional[float] = None) -> List[ModelTier]:
+        now = time.monotonic() if now is None else now
+        by_speed = sorted(self.tiers, key=lambda t: t.stats.latency)
+        if queue_depth >= self.queue_threshold:
+            ordered = by_speed
+        else:
+            fits = [t for t in self.tiers if t.stats.latency <= budget]
+            ordered = fits + [t for t in by_speed if t not in fits]
+        # Stable sort keeps the order above among healthy (or probed) models
+        demoted = {id(t) for t in ordered if t.stats.unhealthy and not t.stats.take_probe(now)}
+        return sorted(ordered, key=lambda t: id(t) in demoted)
+
+    @staticmethod
+    def attempt_timeout(remaining: float, later: List[ModelTier]) -> float:
+        """Time one attempt may take while keeping room for a fallback."""
+        if not later:
+            return remaining
+        reserve = min(t.stats.latency for t in later)
+        return max(remaining - reserve, remaining / 2)
+
+    async def generate(
+        self,
+        messages: List[dict],
+        budget: float,
+        queue_depth: int = 0,
+        parse: Callable[[str], Any] = lambda content: content
+    ) -> RoutedResult:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget
+        errors = []
+        plan = self.plan(budget, queue_depth)
+        for i, tier in enumerate(plan):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            started = loop.time()
+            try:
+                completion = await asyncio.wait_for(
+                    tier.provider.complete(tier.model, messages),
+                    self.attempt_timeout(remaining, plan[i + 1:])
+                )
+                value = parse(completion.content)
+            except Exception as e:
+                elapsed = loop.time() - started
+                tier.stats.record(elapsed, ok=False, timed_out=isinstance(e, asyncio.TimeoutError))
+                logger.warning(f"Model {tier.model} failed after {elapsed:.2f}s: {e!r}")
+                errors.append(f"{tier.model}: {e!r}")
+                continue
+            elapsed = loop.time() - started
+            tier.stats.record(elapsed, ok=True)
+            return RoutedResult(value, tier.model, completion.tokens, elapsed)
+        raise ProviderError("All models failed: " + "; ".join(errors or ["latency budget exhausted"]))
+
+    def stats(self) -> List[dict]:
+        return [
+            {
+                "provider": t.provider.name,
+                "model": t.model,
+                "latency_ewma": round(t.stats.latency, 3),
+                "successes": t.stats.successes,
+                "failures": t.stats.failures,
+                "success_rate": round(t.stats.success_rate, 3),
+                "unhealthy": t.stats.unhealthy
+            }
+            for t in self.tiers
+        ]
+
+
+def parse_model_tiers(spec: str, provider) -> List[ModelTier]:
+    """Parse "model:expected_latency,..." (best quality first) into tiers."""
+    tiers = []
+    for item in spec.split(","):
+        model, _, latency = item.strip().partition(":")
+        tiers.append(ModelTier(provider, model, float(latency or 10)))
+    return tiers
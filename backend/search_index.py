@@ -0,0 +1,190 @@
+import json
+import logging
+import re
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger("infomap-api")
+
+# One row per headline; only title/source/date are tokenized
+CREATE_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS headline_fts USING fts5(
+    title, source, date,
+    kind UNINDEXED, ref_id UNINDEXED, user_id UNINDEXED,
+    country UNINDEXED, topic UNINDEXED, time_filter UNINDEXED, created_at UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+INSERT_FTS = (
+    "INSERT INTO headline_fts "
+    "(title, source, date, kind, ref_id, user_id, country, topic, time_filter, created_at) "
+    "VALUES (:title, :source, :date, :kind, :ref_id, :user_id, :country, :topic, :time_filter, :created_at)"
+)
+
+# Cache entries only reflect the latest refresh of each key. Their rowids are
+# assigned contiguously and recorded here, so a refresh can drop the previous
+# ones by rowid instead of scanning the FTS table for the key
+CREATE_CACHE_RANGES = """
+CREATE TABLE IF NOT EXISTS headline_fts_cache (
+    country TEXT NOT NULL, time_filter TEXT NOT NULL, topic TEXT NOT NULL,
+    first_rowid INTEGER NOT NULL, last_rowid INTEGER NOT NULL,
+    PRIMARY KEY (country, time_filter, topic)
+)
+"""
+
+INSERT_CACHE_FTS = (
+    "INSERT INTO headline_fts "
+    "(rowid, title, source, date, kind, ref_id, user_id, country, topic, time_filter, created_at) "
+    "VALUES (:rowid, :title, :source, :date, :kind, :ref_id, :user_id, :country, :topic, :time_filter, :created_at)"
+)
+
+KEY_FILTER = "country = :country AND time_filter = :time_filter AND topic = :topic"
+
+_TOKEN = re.compile(r"\w+\*?", re.UNICODE)
+
+
+def create_search_index(connection) -> bool:
+    """Create the FTS5 tables; returns True when the index needs a backfill."""
+    existing = set(connection.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' "
+        "AND name IN ('headline_fts', 'headline_fts_cache')"
+    )).scalars())
+    connection.execute(text(CREATE_FTS))
+    connection.execute(text(CREATE_CACHE_RANGES))
+    return existing != {"headline_fts", "headline_fts_cache"}
+
+
+def source_domain(url: str) -> str:
+    """Host part of a source URL (cheaper than urlparse on bulk rebuilds)."""
+    if "//" not in url:
+        return url
+    return url.split("//", 1)[1].split("/", 1)[0]
+
+
+def headline_entries(row, kind: str) -> list:
+    """Extract one FTS entry per headline of a GlobalCache/QueryHistory row."""
+    try:
+        news = json.loads(row.news_json)
+    except ValueError:
+        return []
+    entries = []
+    for item in news if isinstance(news, list) else []:
+        if not isinstance(item, dict) or not item.get("titre"):
+            continue
+        entries.append({
+            "title": item["titre"],
+            "source": source_domain(item.get("source_url") or ""),
+            "date": str(item.get("date") or ""),
+            "kind": kind,
+            "ref_id": row.id,
+            "user_id": getattr(row, "user_id", None),
+            "country": row.country,
+            "topic": row.topic,
+            "time_filter": row.time_filter,
+            "created_at": row.created_at.isoformat()
+        })
+    return entries
+
+
+def index_rows(connection, rows: Iterable, kind: str):
+    if kind == "cache":
+        for row in rows:
+            replace_cache_entries(connection, row)
+        return
+    entries = [e for row in rows for e in headline_entries(row, kind)]
+    if entries:
+        connection.exec_driver_sql(INSERT_FTS, entries)
+
+
+def replace_cache_entries(connection, row):
+    """Index a GlobalCache row in place of the previous refresh of its key."""
+    key = {"country": row.country, "time_filter": row.time_filter, "topic": row.topic}
+    previous = connection.execute(
+        text(f"SELECT first_rowid, last_rowid FROM headline_fts_cache WHERE {KEY_FILTER}"), key
+    ).first()
+    if previous:
+        connection.execute(
+            text("DELETE FROM headline_fts WHERE rowid BETWEEN :first AND :last"),
+            {"first": previous.first_rowid, "last": previous.last_rowid}
+        )
+        connection.execute(text(f"DELETE FROM headline_fts_cache WHERE {KEY_FILTER}"), key)
+
+    entries = headline_entries(row, "cache")
+    if not entries:
+        return
+    last_rowid = connection.execute(
+        text("SELECT rowid FROM headline_fts ORDER BY rowid DESC LIMIT 1")
+    ).scalar() or 0
+    for offset, entry in enumerate(entries, start=1):
+        entry["rowid"] = last_rowid + offset
+    connection.exec_driver_sql(INSERT_CACHE_FTS, entries)
+    connection.execute(
+        text(
+            "INSERT INTO headline_fts_cache (country, time_filter, topic, first_rowid, last_rowid) "
+            "VALUES (:country, :time_filter, :topic, :first, :last)"
+        ),
+        dict(key, first=entries[0]["rowid"], last=entries[-1]["rowid"])
+    )
+
+
+def remove_entries(connection, kind: str, ref_id: Optional[int] = None, user_id: Optional[int] = None):
+    clauses = ["kind = :kind"]
+    params = {"kind": kind}
+    if ref_id is not None:
+        clauses.append("ref_id = :ref_id")
+        params["ref_id"] = ref_id
+    if user_id is not None:
+        clauses.append("user_id = :user_id")
+        params["user_id"] = user_id
+    connection.execute(text(f"DELETE FROM headline_fts WHERE {' AND '.join(clauses)}"), params)
+    if kind == "cache" and ref_id is None:
+        connection.execute(text("DELETE FROM headline_fts_cache"))
+
+
+def to_match_query(query: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: every word must match.
+
+    Words are quoted so FTS5 operators in user input are treated literally;
+    a trailing ``*`` is kept as a prefix search.
+    """
+    terms = []
+    for token in _TOKEN.findall(query):
+        word = token.rstrip("*")
+        if word:
+            terms.append(f'"{word}"*' if token.endswith("*") else f'"{word}"')
+    return " ".join(terms) or None
+
+
+def search(
+    connection,
+    query: str,
+    user_id: int,
+    kinds: Iterable[str] = ("cache", "history"),
+    since: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> list:
+    """Ranked headline matches from the cache and the user's own history."""
+    match = to_match_query(query)
+    if not match:
+        return []
+    clauses = ["headline_fts MATCH :match"]
+    params = {"match": match, "user_id": user_id, "limit": limit, "offset": offset}
+    scopes = []
+    if "cache" in kinds:
+        scopes.append("kind = 'cache'")
+    if "history" in kinds:
+        scopes.append("(kind = 'history' AND user_id = :user_id)")
+    clauses.append(f"({' OR '.join(scopes)})")
+    if since:
+        clauses.append("created_at >= :since")
+        params["since"] = since
+
+    statement = text(
+        "SELECT title, source, date, kind, ref_id, country, topic, time_filter, created_at, rank "
+        f"FROM headline_fts WHERE {' AND '.join(clauses)} "
+        "ORDER BY rank LIMIT :limit OFFSET :offset"
+    )
+    return [dict(r._mapping) for r in connection.execute(statement, params)]
@@ -0,0 +1,132 @@
+"""Bulk-generate synthetic users, quotas, history and cache rows for scale tests.
+
+Usage:
+    python seed_data.py --db scale.db --users 20000 --history 1000000 --cache 1000000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from database import DatabaseService, get_db_service
+from models import User, DailyQuota, QueryHistory, GlobalCache
+
+COUNTRIES = [
+    "France", "Germany", "Spain", "Italy", "United Kingdom", "United States of America",
+    "Canada", "Brazil", "Argentina", "Mexico", "Chile", "Peru", "Japan", "China", "India",
+    "Indonesia", "Australia", "South Africa", "Nigeria", "Kenya", "Egypt", "Morocco",
+    "Turkey", "Russia", "Ukraine", "Poland", "Sweden", "Norway", "Israel", "Iran",
+    "Saudi Arabia", "Pakistan", "South Korea", "Vietnam", "Philippines", "Colombia"
+]
+TOPICS = ["General", "Economy", "Politics", "Tech", "Military"]
+TIME_FILTERS = ["24h", "7d"]
+SUBJECTS = [
+    "elections", "inflation", "central bank", "strike", "parliament", "budget", "trade deal",
+    "drought", "wildfire", "summit", "protests", "startup", "satellite launch", "border talks"
+]
+SOURCES = ["reuters.com", "apnews.com", "bbc.com", "lemonde.fr", "aljazeera.com", "nhk.or.jp"]
+
+
+def fake_news(rng: random.Random, country: str, day: datetime) -> str:
+    return json.dumps([
+        {
+            "titre": f"{country}: {rng.choice(SUBJECTS)} {rng.choice(['dominates', 'reshapes', 'stalls', 'sparks debate'])}",
+            "date": day.strftime('%Y-%m-%d'),
+            "source_url": f"https://www.{rng.choice(SOURCES)}/{rng.randrange(10**6)}"
+        }
+        for _ in range(5)
+    ])
+
+
+def _insert_chunks(connection, table, rows, chunk_size: int = 5000):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            connection.execute(table.insert(), chunk)
+            chunk = []
+    if chunk:
+        connection.execute(table.insert(), chunk)
+
+
+def seed(engine, users: int, history: int, cache: int, days: int = 30, seed: int = 0, index_search: bool = False):
+    """Insert synthetic rows. History and cache timestamps span the last `days` days."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    first_user_id = 1
+
+    def when():
+        return now - timedelta(seconds=rng.randrange(days * 86400))
+
+    with engine.begin() as connection:
+        first_user_id += connection.execute(text("SELECT COALESCE(MAX(id), 0) FROM user")).scalar()
+        _insert_chunks(connection, User.__table__, (
+            {
+                "email": f"user{first_user_id + i}@scale.example",
+                "is_admin": False,
+                "is_active": rng.random() < 0.8,
+                "max_daily_quota": rng.choice([5, 5, 5, 10, 15])
+            }
+            for i in range(users)
+        ))
+        user_ids = range(first_user_id, first_user_id + users)
+
+        # Roughly a third of users were active on each of the last few days
+        _insert_chunks(connection, DailyQuota.__table__, (
+            {
+                "user_id": user_id,
+                "date": (now - timedelta(days=d)).strftime('%Y-%m-%d'),
+                "count": rng.randint(1, 5)
+            }
+            for d in range(min(days, 7))
+            for user_id in user_ids
+            if rng.random() < 0.33
+        ))
+
+        def rows(count, with_user):
+            for _ in range(count):
+                country = rng.choice(COUNTRIES)
+                created_at = when()
+                row = {
+                    "country": country,
+                    "time_filter": rng.choice(TIME_FILTERS),
+                    "topic": rng.choice(TOPICS),
+                    "news_json": fake_news(rng, country, created_at),
+                    "stats_json": None,
+                    "created_at": created_at
+                }
+                if with_user:
+                    row["user_id"] = rng.choice(user_ids)
+                yield row
+
+        if user_ids:
+            _insert_chunks(connection, QueryHistory.__table__, rows(history, True))
+        _insert_chunks(connection, GlobalCache.__table__, rows(cache, False))
+        connection.execute(text("ANALYZE"))
+
+    if index_search:
+        DatabaseService(engine).rebuild_search_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="scale.db", help="SQLite file to create or extend")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--history", type=int, default=1000000)
+    parser.add_argument("--cache", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--search", action="store_true", help="Also build the headline search index")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    db_service = get_db_service(f"sqlite:///{args.db}")
+    seed(db_service.engine, args.users, args.history, args.cache, args.days, args.seed, args.search)
+    print(f"Seeded {args.db} in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from main import app, get_current_user
@@ -44,3 +45,71 @@ def test_unauthorized_admin_access():
     assert response.status_code == 403
     
     app.dependency_overrides.clear()
+
+def test_analytics_admin(client):
+    response = client.get("/admin/analytics?days=7")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["days"] == 7
+    assert {"daily", "top_countries", "topics", "top_users"} <= data.keys()
+
+def test_bulk_import_and_export_users(client):
+    body = (
+        "email,is_active,max_daily_quota\n"
+        "bulk1@test.com,true,7\n"
+        "not-an-email,true,5\n"
+        "bulk2@test.com,false,\n"
+        "bulk1@test.com,false,9\n"
+    )
+    response = client.post("/admin/users/import?format=csv", content=body)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["errors"] == [{"row": 2, "error": "invalid email: 'not-an-email'"}]
+    assert result["created"] + result["updated"] == 3
+
+    response = client.get("/admin/users/export?format=ndjson")
+    assert response.status_code == 200
+    users = {u["email"]: u for u in map(json.loads, response.text.splitlines())}
+    assert users["bulk1@test.com"]["max_daily_quota"] == 9
+    assert users["bulk1@test.com"]["is_active"] is False
+    assert users["bulk2@test.com"]["max_daily_quota"] == 5
+
+    response = client.get("/admin/users/export?format=csv")
+    assert response.text.splitlines()[0] == "email,is_admin,is_active,max_daily_quota,today_count"
+
+def test_bulk_import_csv_with_byte_order_mark(client):
+    body = "\ufeffemail,is_active,max_daily_quota\r\nbom1@test.com,true,6\r\n".encode("utf-8")
+    response = client.post("/admin/users/import?format=csv", content=body)
+    assert response.status_code == 200
+    assert response.json()["errors"] == []
+    assert response.json()["created"] + response.json()["updated"] == 1
+
+def test_bulk_import_ndjson_reports_bad_rows(client):
+    body = '{"email": "bulk3@test.com", "max_daily_quota": 3}\n[1, 2]\n{"email": "bulk4@test.com", "max_daily_quota": -1}\n'
+    response = client.post("/admin/users/import?format=ndjson", content=body)
+    assert response.status_code == 200
+    assert [e["row"] for e in response.json()["errors"]] == [2, 3]
+
+def test_bulk_import_cannot_touch_admins(client):
+    from main import db_service
+    other_admin = db_service.get_or_create_user("other-admin@test.com")
+    with Session(db_service.engine) as session:
+        other_admin.is_admin = other_admin.is_active = True
+        session.add(other_admin)
+        session.commit()
+
+    body = (
+        "email,is_active,max_daily_quota\n"
+        "pl.bellier@gmail.com,false,0\n"
+        "bulk5@test.com,true,4\n"
+        "other-admin@test.com,false,0\n"
+    )
+    response = client.post("/admin/users/import?format=csv", content=body)
+    assert response.status_code == 200
+    result = response.json()
+    assert [e["row"] for e in result["errors"]] == [1, 3]
+    assert result["created"] + result["updated"] == 1
+
+    users = {u["email"]: u for u in client.get("/admin/users").json()}
+    assert users["pl.bellier@gmail.com"]["is_active"] is True
+    assert users["other-admin@test.com"]["is_active"] is True
@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from admission import AdmissionGate, AdmissionRejected, Priority
+
+@pytest.mark.asyncio
+async def test_waiters_served_by_priority():
+    gate = AdmissionGate(max_concurrent=1, max_queue=5, max_wait=1)
+    order = []
+
+    async def worker(name, priority):
+        async with gate.slot(priority):
+            order.append(name)
+
+    await gate.acquire()  # Occupy the only slot
+    tasks = [
+        asyncio.create_task(worker("prefetch", Priority.PREFETCH)),
+        asyncio.create_task(worker("user", Priority.INTERACTIVE)),
+        asyncio.create_task(worker("admin", Priority.ADMIN)),
+    ]
+    await asyncio.sleep(0.01)
+    assert gate.stats()["queued"] == 3
+
+    gate.release()
+    await asyncio.gather(*tasks)
+    assert order == ["admin", "user", "prefetch"]
+    assert gate.stats()["active"] == 0
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_full():
+    gate = AdmissionGate(max_concurrent=1, max_queue=1, max_wait=1, retry_after=7)
+    await gate.acquire()
+    waiter = asyncio.create_task(gate.acquire())
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(AdmissionRejected) as exc:
+        await gate.acquire()
+    assert exc.value.retry_after == 7
+
+    gate.release()
+    await waiter
+    gate.release()
+    assert gate.stats() == {"active": 0, "queued": 0, "max_concurrent": 1, "max_queue": 1}
+
+@pytest.mark.asyncio
+async def test_rejects_after_max_wait():
+    gate = AdmissionGate(max_concurrent=1, max_queue=5, max_wait=0.05)
+    await gate.acquire()
+
+    with pytest.raises(AdmissionRejected):
+        await gate.acquire()
+    assert gate.stats()["queued"] == 0
+
+    gate.release()
+    assert gate.stats()["active"] == 0
@@ -0,0 +1,85 @@
+import time
+import multiprocessing
+import pytest
+from sqlmodel import Session, select
+from database import get_db_service, LeaseRelease, cache_key
+from models import GlobalCache, User
+from coherence import UserCache, RefreshFeed
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two database services on the same SQLite file, like two worker processes."""
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+    return get_db_service(url), get_db_service(url)
+
+def make_cache(country="France"):
+    return GlobalCache(country=country, time_filter="24h", topic="General", news_json='[{"titre": "x"}]')
+
+def test_lease_is_exclusive_until_released(workers):
+    a, b = workers
+    key = cache_key("France", "24h", "General")
+    assert a.acquire_lease(key, "worker-a", ttl=30)
+    assert not b.acquire_lease(key, "worker-b", ttl=30)
+    assert b.is_lease_held(key)
+
+    # Releasing with the cache write makes the entry visible atomically
+    a.write_batch([make_cache(), LeaseRelease(key, "worker-a")])
+    assert not b.is_lease_held(key)
+    assert b.get_cached_news("France", "24h", "General") is not None
+    assert b.acquire_lease(key, "worker-b", ttl=30)
+
+def test_expired_lease_can_be_taken_over(workers):
+    a, b = workers
+    key = cache_key("Spain", "7d", "Tech")
+    assert a.acquire_lease(key, "worker-a", ttl=-1)
+    assert b.acquire_lease(key, "worker-b", ttl=30)
+    # The stale holder can no longer release the new owner's lease
+    a.release_lease(key, "worker-a")
+    assert a.is_lease_held(key)
+
+def test_user_cache_invalidated_across_workers(workers):
+    a, b = workers
+    cache_a = UserCache(a, check_interval=0)
+    cache_b = UserCache(b, check_interval=0)
+    assert cache_b.get_or_create("coherent@example.com").max_daily_quota == 5
+
+    with Session(a.engine) as session:
+        user = session.exec(select(User).where(User.email == "coherent@example.com")).one()
+        user.max_daily_quota = 42
+        session.add(user)
+        session.commit()
+    assert cache_b.get_or_create("coherent@example.com").max_daily_quota == 5  # Still cached
+
+    cache_a.invalidate()
+    assert cache_b.get_or_create("coherent@example.com").max_daily_quota == 42
+
+def test_user_cache_checks_version_at_most_once_per_interval(workers):
+    a, _ = workers
+    cache = UserCache(a, check_interval=60)
+    cache.get_or_create("cached@example.com")
+    a.bump_state_version(UserCache.VERSION_NAME)
+    started = time.monotonic()
+    assert cache.get_or_create("cached@example.com") is cache.get_or_create("cached@example.com")
+    assert time.monotonic() - started < 1
+
+def test_refresh_feed_publishes_rows_from_other_workers(workers):
+    a, b = workers
+    published = []
+    feed = RefreshFeed(b, lambda key, event: published.append((key, event["news"])))
+    feed.last_id = b.get_last_cache_id()
+
+    a.write_batch([make_cache("Chile"), make_cache("Peru")])
+    assert feed.poll() == 2
+    assert [key for key, _ in published] == [("Chile", "General", "24h"), ("Peru", "General", "24h")]
+    assert feed.poll() == 0
+
+def _start_worker(url):
+    get_db_service(url)
+
+def test_concurrent_worker_startup_on_fresh_database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'fresh.db'}"
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(4) as pool:
+        # Any "table ... already exists" error is re-raised here
+        pool.map(_start_worker, [url] * 4)
+    assert get_db_service(url).get_last_cache_id() == 0
@@ -59,3 +59,24 @@ def test_quota_exceeded(db_service):
     db_service.increment_quota(user_id, today)
     
     assert db_service.has_quota_remaining(email, today) is False
+
+def test_usage_rollups(db_service):
+    from database import UsageEvent
+    user = db_service.get_or_create_user("rollup@example.com")
+    db_service.write_batch([
+        UsageEvent("2026-01-24", user.id, "France", "General", cache_hit=True),
+        UsageEvent("2026-01-24", user.id, "France", "General", upstream_call=True, upstream_tokens=100),
+        UsageEvent("2026-01-25", user.id, "Spain", "Tech", upstream_call=True, upstream_tokens=50),
+    ])
+    # A later batch increments the existing rollup rows
+    db_service.write_batch([UsageEvent("2026-01-25", user.id, "Spain", "Tech", cache_hit=True)])
+
+    analytics = db_service.get_usage_analytics("2026-01-24", "2026-01-25")
+    assert analytics["daily"] == [
+        {"date": "2026-01-24", "requests": 2, "cache_hits": 1, "cache_hit_ratio": 0.5, "upstream_calls": 1, "upstream_tokens": 100},
+        {"date": "2026-01-25", "requests": 2, "cache_hits": 1, "cache_hit_ratio": 0.5, "upstream_calls": 1, "upstream_tokens": 50},
+    ]
+    assert {c["country"] for c in analytics["top_countries"]} == {"France", "Spain"}
+    assert analytics["top_users"] == [{"email": "rollup@example.com", "requests": 4, "upstream_calls": 2}]
+
+    assert db_service.get_usage_analytics("2026-01-25", "2026-01-25")["topics"] == [{"topic": "Tech", "requests": 2}]
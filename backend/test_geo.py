@@ -0,0 +1,97 @@
+import gzip
+import json
+from geo import GeoAsset, GeoStore, simplify_geojson
+
+SQUARE = [[0.0, 0.0], [1.23456, 0.0], [1.23456, 1.0], [1.234561, 1.0], [0.0, 1.0], [0.0, 0.0]]
+DATA = {
+    "type": "FeatureCollection",
+    "features": [
+        {
+            "type": "Feature",
+            "properties": {"NAME": "Testland", "ADMIN": "Testland", "POP_EST": 42},
+            "geometry": {"type": "Polygon", "coordinates": [SQUARE]}
+        },
+        {
+            "type": "Feature",
+            "properties": {"NAME": "Islands"},
+            "geometry": {"type": "MultiPolygon", "coordinates": [[SQUARE], [SQUARE]]}
+        }
+    ]
+}
+
+def test_simplify_quantizes_and_strips_properties():
+    simplified = simplify_geojson(DATA, precision=2)
+    first = simplified["features"][0]
+    assert first["properties"] == {"NAME": "Testland", "ADMIN": "Testland"}
+    # Rounded duplicates collapse into a single point
+    assert first["geometry"]["coordinates"][0] == [[0.0, 0.0], [1.23, 0.0], [1.23, 1.0], [0.0, 1.0], [0.0, 0.0]]
+    assert len(simplified["features"][1]["geometry"]["coordinates"]) == 2
+
+def test_asset_encodings_round_trip():
+    asset = GeoAsset.build(DATA)
+    assert json.loads(gzip.decompress(asset.bodies["gzip"])) == DATA
+    assert asset.negotiate("gzip, deflate") == "gzip"
+    assert asset.negotiate("gzip;q=0") == "identity"
+    assert asset.negotiate("") == "identity"
+    if "br" in asset.bodies:
+        assert asset.negotiate("gzip, deflate, br") == "br"
+
+def test_store_builds_variants_once(tmp_path):
+    path = tmp_path / "countries.geojson"
+    path.write_text(json.dumps(DATA))
+    store = GeoStore(str(path))
+
+    full = store.get("full")
+    assert json.loads(full.bodies["identity"]) == DATA
+    assert store.get("simplified").etag != full.etag
+    assert store.get("simplified") is store.get("simplified")
+
+def test_store_missing_dataset(tmp_path):
+    assert GeoStore(str(tmp_path / "missing.geojson")).get("full") is None
+
+def test_store_unreadable_dataset(tmp_path, monkeypatch):
+    path = tmp_path / "countries.geojson"
+    path.write_text("{not json")
+    assert GeoStore(str(path)).get("full") is None
+
+    def denied(*args, **kwargs):
+        raise PermissionError(13, "Permission denied")
+
+    # e.g. a root-owned 0600 file in the image
+    path.write_text(json.dumps(DATA))
+    monkeypatch.setattr("geo.open", denied, raising=False)
+    assert GeoStore(str(path)).load() is False
+
+def test_country_geometry_route(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    path = tmp_path / "countries.geojson"
+    path.write_text(json.dumps(DATA))
+    monkeypatch.setattr(main, "geo_store", GeoStore(str(path)))
+    client = TestClient(main.app)
+
+    index = client.get("/geo/countries")
+    assert index.headers["cache-control"] == "no-cache"
+    name = index.json()["simplified"]
+    assert name == f"simplified.{main.geo_store.get('simplified').version}.json"
+
+    response = client.get(f"/geo/countries/{name}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.json()["features"][0]["properties"]["NAME"] == "Testland"
+
+    etag = response.headers["etag"]
+    response = client.get(f"/geo/countries/{name}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    assert client.get("/geo/countries/simplified.0123456789abcdef.json").status_code == 404
+    assert client.get("/geo/countries/bogus.json").status_code == 400
+
+def test_country_geometry_index_unavailable(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    monkeypatch.setattr(main, "geo_store", GeoStore(str(tmp_path / "missing.geojson")))
+    assert TestClient(main.app).get("/geo/countries").status_code == 503
@@ -0,0 +1,64 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlmodel import Session, delete
+from main import app, get_current_user, db_service
+from models import QueryHistory
+
+EMAIL = "history@test.com"
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user] = lambda: {"email": EMAIL}
+    user = db_service.get_or_create_user(EMAIL)
+    now = datetime.utcnow()
+    # Two rows share a timestamp to exercise the id tie-breaker
+    stamps = [now, now - timedelta(minutes=1), now - timedelta(minutes=1), now - timedelta(minutes=2), now - timedelta(minutes=3)]
+    db_service.write_batch([
+        QueryHistory(
+            user_id=user.id, country=f"Country{i}", time_filter="24h", topic="General",
+            news_json='[{"titre": "t"}]', stats_json=None, created_at=stamp
+        )
+        for i, stamp in enumerate(stamps)
+    ])
+    yield TestClient(app)
+    with Session(db_service.engine) as session:
+        session.exec(delete(QueryHistory).where(QueryHistory.user_id == user.id))
+        session.commit()
+    app.dependency_overrides.clear()
+
+def test_history_cursor_pagination(client):
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/history", params=params)
+        assert response.status_code == 200
+        seen += [h["country"] for h in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert sorted(seen) == [f"Country{i}" for i in range(5)]
+    assert len(set(seen)) == 5
+
+def test_history_summary_omits_payload(client):
+    response = client.get("/history", params={"fields": "summary"})
+    assert response.status_code == 200
+    item = response.json()[0]
+    assert "news" not in item and "stats" not in item
+    assert item["country"] == "Country0"
+
+def test_history_detail(client):
+    item_id = client.get("/history", params={"fields": "summary"}).json()[0]["id"]
+    response = client.get(f"/history/{item_id}")
+    assert response.status_code == 200
+    assert response.json()["news"] == [{"titre": "t"}]
+
+    assert client.get("/history/999999").status_code == 404
+
+def test_history_invalid_cursor(client):
+    response = client.get("/history", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,40 @@
+import asyncio
+import time
+import pytest
+from loop_monitor import LoopMonitor, LoopMonitorMiddleware
+
+def blocking_helper():
+    time.sleep(0.3)
+
+@pytest.mark.asyncio
+async def test_lag_is_measured():
+    monitor = LoopMonitor(interval=0.02, threshold=0.05)
+    await monitor.start()
+    await asyncio.sleep(0.05)
+    time.sleep(0.15)
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    snapshot = monitor.snapshot()
+    assert snapshot["lag_ms"]["max"] >= 100
+    assert snapshot["incidents"] == []  # Stacks are only captured in debug mode
+
+@pytest.mark.asyncio
+async def test_debug_mode_captures_stack_and_route():
+    monitor = LoopMonitor(interval=0.02, threshold=0.05, debug=True)
+
+    async def app(scope, receive, send):
+        blocking_helper()
+
+    await monitor.start()
+    await asyncio.sleep(0.05)
+    middleware = LoopMonitorMiddleware(app, monitor)
+    await middleware({"type": "http", "method": "GET", "path": "/slow"}, None, None)
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    incidents = monitor.snapshot()["incidents"]
+    assert len(incidents) == 1
+    assert incidents[0]["route"] == "GET /slow"
+    assert "blocking_helper" in incidents[0]["stack"]
+    assert monitor.routes == {}
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import time
+import pytest
+from news_providers import FakeProvider, ModelRouter, ModelTier, ProviderError, parse_model_tiers
+
+MESSAGES = [{"role": "user", "content": "Headlines in France"}]
+
+def make_router(provider, queue_threshold=4):
+    return ModelRouter(
+        [ModelTier(provider, "sonar-pro", 12), ModelTier(provider, "sonar", 4)],
+        queue_threshold=queue_threshold
+    )
+
+def test_fake_provider_is_deterministic():
+    provider = FakeProvider()
+    first = asyncio.run(provider.complete("sonar", MESSAGES))
+    second = asyncio.run(provider.complete("sonar", MESSAGES))
+    assert first == second
+    assert len(json.loads(first.content)["news"]) == 5
+
+def test_plan_prefers_quality_when_budget_allows():
+    router = make_router(FakeProvider())
+    assert [t.model for t in router.plan(budget=20)] == ["sonar-pro", "sonar"]
+
+def test_plan_prefers_fast_model_when_budget_tight_or_queue_deep():
+    router = make_router(FakeProvider())
+    assert [t.model for t in router.plan(budget=5)] == ["sonar", "sonar-pro"]
+    assert [t.model for t in router.plan(budget=20, queue_depth=4)] == ["sonar", "sonar-pro"]
+
+@pytest.mark.asyncio
+async def test_generate_falls_back_on_error():
+    provider = FakeProvider(failing=("sonar-pro",))
+    router = make_router(provider)
+
+    result = await router.generate(MESSAGES, budget=20, parse=json.loads)
+
+    assert result.model == "sonar"
+    assert provider.calls == ["sonar-pro", "sonar"]
+    stats = {s["model"]: s for s in router.stats()}
+    assert stats["sonar-pro"]["failures"] == 1
+    assert stats["sonar"]["successes"] == 1
+
+@pytest.mark.asyncio
+async def test_generate_falls_back_on_unparseable_answer():
+    router = make_router(FakeProvider())
+    calls = []
+
+    def parse(content):
+        calls.append(content)
+        if len(calls) == 1:
+            raise ValueError("not json")
+        return json.loads(content)
+
+    result = await router.generate(MESSAGES, budget=20, parse=parse)
+    assert result.model == "sonar"
+
+@pytest.mark.asyncio
+async def test_generate_raises_when_all_models_fail():
+    router = make_router(FakeProvider(failing=("sonar-pro", "sonar")))
+    with pytest.raises(ProviderError):
+        await router.generate(MESSAGES, budget=20)
+
+@pytest.mark.asyncio
+async def test_unhealthy_model_is_demoted():
+    provider = FakeProvider(failing=("sonar-pro",))
+    router = make_router(provider)
+    for _ in range(5):
+        await router.generate(MESSAGES, budget=20)
+
+    assert [t.model for t in router.plan(budget=20)] == ["sonar", "sonar-pro"]
+
+@pytest.mark.asyncio
+async def test_unhealthy_model_recovers_through_probes():
+    provider = FakeProvider(failing=("sonar-pro",))
+    router = make_router(provider)
+    for _ in range(5):
+        await router.generate(MESSAGES, budget=20)
+    provider.failing.clear()  # The outage is over
+
+    later = time.monotonic() + 31
+    # One request per probe interval tries the model in its usual place
+    assert [t.model for t in router.plan(budget=20, now=later)] == ["sonar-pro", "sonar"]
+    assert [t.model for t in router.plan(budget=20, now=later)] == ["sonar", "sonar-pro"]
+
+    # Let the next real request probe
+    router.tiers[0].stats.last_failure = router.tiers[0].stats.last_probe = float("-inf")
+    result = await router.generate(MESSAGES, budget=20)
+    assert result.model == "sonar-pro"
+    assert not router.tiers[0].stats.unhealthy
+
+@pytest.mark.asyncio
+async def test_fast_failures_do_not_lower_latency():
+    router = make_router(FakeProvider(failing=("sonar-pro",)))
+    await router.generate(MESSAGES, budget=20)
+    assert router.tiers[0].stats.latency == 12
+
+@pytest.mark.asyncio
+async def test_timeout_leaves_time_for_fallback():
+    provider = FakeProvider(latency={"sonar-pro": 5, "sonar": 0.05})
+    router = ModelRouter([ModelTier(provider, "sonar-pro", 0.1), ModelTier(provider, "sonar", 0.2)])
+
+    result = await router.generate(MESSAGES, budget=0.6)
+
+    assert result.model == "sonar"
+    assert provider.calls == ["sonar-pro", "sonar"]
+    # The timeout counts as evidence that the model is slow
+    assert router.tiers[0].stats.latency > 0.1
+
+def test_parse_model_tiers():
+    tiers = parse_model_tiers("sonar-pro:12, sonar", FakeProvider())
+    assert [(t.model, t.expected_latency) for t in tiers] == [("sonar-pro", 12.0), ("sonar", 10.0)]
@@ -0,0 +1,63 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlmodel import SQLModel, create_engine
+from database import DatabaseService
+from seed_data import seed
+
+@pytest.fixture(scope="module")
+def db_service():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    service = DatabaseService(engine)
+    seed(engine, users=300, history=3000, cache=3000, days=7)
+    yield service
+    SQLModel.metadata.drop_all(engine)
+
+def query_plans(db_service, fn):
+    """Run fn and return (sql, plan lines) for every SELECT it issued."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(db_service.engine, "before_cursor_execute", capture)
+    try:
+        fn()
+    finally:
+        event.remove(db_service.engine, "before_cursor_execute", capture)
+
+    with db_service.engine.connect() as connection:
+        return [
+            (sql, [row[3] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params)])
+            for sql, params in captured
+        ]
+
+def assert_indexed(plans):
+    assert plans
+    for sql, plan in plans:
+        full_scans = [line for line in plan if line.startswith("SCAN") and "VIRTUAL TABLE" not in line]
+        assert not full_scans, f"Full scan {full_scans} in:\n{sql}"
+        sorts = [line for line in plan if "TEMP B-TREE FOR ORDER BY" in line]
+        assert not sorts, f"Unindexed ORDER BY in:\n{sql}"
+
+def test_cached_news_uses_index(db_service):
+    assert_indexed(query_plans(db_service, lambda: db_service.get_cached_news("France", "24h", "General")))
+
+def test_history_page_uses_index(db_service):
+    since = datetime.utcnow() - timedelta(days=7)
+    assert_indexed(query_plans(db_service, lambda: db_service.get_history_page(5, since, 21)))
+    assert_indexed(query_plans(
+        db_service, lambda: db_service.get_history_page(5, since, 21, before=(datetime.utcnow(), 100), summary=True)
+    ))
+
+def test_user_listing_uses_index(db_service):
+    today = datetime.utcnow().strftime('%Y-%m-%d')
+    assert_indexed(query_plans(db_service, lambda: list(db_service.iter_users_with_quota(today, chunk_size=100))))
+
+def test_user_and_quota_lookups_use_index(db_service):
+    today = datetime.utcnow().strftime('%Y-%m-%d')
+    assert_indexed(query_plans(db_service, lambda: db_service.get_or_create_user("user5@scale.example")))
+    assert_indexed(query_plans(db_service, lambda: db_service.get_daily_count(5, today)))
+    assert_indexed(query_plans(db_service, lambda: db_service.get_watchlist(5)))
@@ -0,0 +1,116 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+from sqlmodel import SQLModel, create_engine
+from database import DatabaseService
+from models import GlobalCache, QueryHistory
+from search_index import to_match_query
+
+def news(*titles):
+    return json.dumps([{"titre": t, "date": "2026-01-24", "source_url": "https://www.lemonde.fr/a"} for t in titles])
+
+@pytest.fixture(name="db_service")
+def db_service_fixture():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    yield DatabaseService(engine)
+    SQLModel.metadata.drop_all(engine)
+
+def test_search_ranks_cached_headlines(db_service):
+    db_service.write_batch([
+        GlobalCache(country="France", time_filter="24h", topic="Politics",
+                    news_json=news("Snap elections called", "Elections: turnout record after elections")),
+        GlobalCache(country="Spain", time_filter="24h", topic="Economy", news_json=news("Inflation slows")),
+    ])
+
+    results = db_service.search_headlines("elections", user_id=1)
+    assert [r["country"] for r in results] == ["France", "France"]
+    assert results[0]["title"] == "Elections: turnout record after elections"
+    assert results[0]["source"] == "www.lemonde.fr"
+    assert db_service.search_headlines("élection*", user_id=1)  # Prefix and diacritics
+
+def test_history_is_private_and_removable(db_service):
+    alice = db_service.get_or_create_user("alice@example.com")
+    bob = db_service.get_or_create_user("bob@example.com")
+    history = QueryHistory(user_id=alice.id, country="Chile", time_filter="7d", topic="Tech",
+                           news_json=news("Observatory opens"))
+    db_service.write_batch([history])
+
+    results = db_service.search_headlines("observatory", alice.id, kinds=("history",))
+    assert len(results) == 1
+    assert db_service.search_headlines("observatory", bob.id) == []
+
+    db_service.remove_search_entries("history", ref_id=results[0]["ref_id"])
+    assert db_service.search_headlines("observatory", alice.id) == []
+
+def test_since_filter(db_service):
+    old = GlobalCache(country="Peru", time_filter="7d", topic="General", news_json=news("Old quake"),
+                      created_at=datetime.utcnow() - timedelta(days=30))
+    db_service.write_batch([old])
+    since = (datetime.utcnow() - timedelta(days=7)).isoformat()
+    assert db_service.search_headlines("quake", 1, since=since) == []
+    assert len(db_service.search_headlines("quake", 1)) == 1
+
+def test_existing_rows_are_backfilled():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    DatabaseService(engine).write_batch([
+        GlobalCache(country="Japan", time_filter="24h", topic="Tech", news_json=news("Robot expo"))
+    ])
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE headline_fts")
+
+    assert len(DatabaseService(engine).search_headlines("robot", 1)) == 1
+
+def test_refresh_replaces_cache_entries(db_service):
+    def refresh(country, *titles):
+        db_service.write_batch([GlobalCache(country=country, time_filter="24h", topic="General", news_json=news(*titles))])
+
+    refresh("Chile", "Copper exports rise")
+    for _ in range(5):
+        refresh("France", "Strike continues", "Budget vote")
+    assert len(db_service.search_headlines("strike", 1)) == 1
+
+    refresh("France", "Budget adopted")
+    assert db_service.search_headlines("strike", 1) == []
+    assert len(db_service.search_headlines("budget", 1)) == 1
+    assert len(db_service.search_headlines("copper", 1)) == 1
+
+    db_service.rebuild_search_index()
+    assert len(db_service.search_headlines("budget", 1)) == 1
+    assert db_service.search_headlines("strike", 1) == []
+
+def test_index_without_cache_ranges_is_rebuilt():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    for _ in range(3):
+        DatabaseService(engine).write_batch([
+            GlobalCache(country="Japan", time_filter="24h", topic="Tech", news_json=news("Robot expo"))
+        ])
+    with engine.begin() as connection:
+        # An index built before cache entries were replaced on refresh
+        connection.exec_driver_sql("DROP TABLE headline_fts_cache")
+        connection.exec_driver_sql("INSERT INTO headline_fts (title, kind) VALUES ('Robot expo', 'cache')")
+
+    assert len(DatabaseService(engine).search_headlines("robot", 1)) == 1
+
+def test_match_query_neutralizes_operators():
+    assert to_match_query('elections OR "x" NEAR(' ) == '"elections" "OR" "x" "NEAR"'
+    assert to_match_query("elect*") == '"elect"*'
+    assert to_match_query("!!!") is None
+
+def test_search_route():
+    from fastapi.testclient import TestClient
+    from main import app, get_current_user, db_service as main_db
+
+    app.dependency_overrides[get_current_user] = lambda: {"email": "searcher@test.com"}
+    main_db.write_batch([
+        GlobalCache(country="Kenya", time_filter="24h", topic="General", news_json=news("Zebracrossing festival"))
+    ])
+    client = TestClient(app)
+
+    response = client.get("/search", params={"q": "zebracrossing", "days": 1})
+    assert response.status_code == 200
+    assert response.json()["results"][0]["country"] == "Kenya"
+    assert client.get("/search", params={"q": "x", "scope": "nope"}).status_code == 400
+    app.dependency_overrides.clear()
@@ -0,0 +1,87 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+from sqlmodel import SQLModel, Session, create_engine
+from database import DatabaseService, cache_key
+from models import GlobalCache, CacheTTLState
+from ttl_policy import TTLPolicy, change_ratio, headline_fingerprint, parse_baselines
+
+HOUR = 3600
+
+def news(*stories, wording=""):
+    """One headline per story id, cited from a stable URL but freshly worded."""
+    return json.dumps([
+        {"titre": f"{wording} story {s}", "date": "", "source_url": f"https://www.example.com/{s}"}
+        for s in stories
+    ])
+
+@pytest.fixture(name="db_service")
+def db_service_fixture():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    policy = TTLPolicy(parse_baselines("24h:7200,7d:36000,24h/Military:1800"), min_ttl=900, max_ttl=8 * HOUR)
+    yield DatabaseService(engine, policy)
+    SQLModel.metadata.drop_all(engine)
+
+def refresh(db_service, payload, topic="General", created_at=None):
+    entry = GlobalCache(country="France", time_filter="24h", topic=topic, news_json=payload)
+    if created_at:
+        entry.created_at = created_at
+    db_service.write_batch([entry])
+
+def ttl_of(db_service, topic="General"):
+    with Session(db_service.engine) as session:
+        return session.get(CacheTTLState, cache_key("France", "24h", topic)).ttl_seconds
+
+def test_baselines_and_overrides():
+    policy = TTLPolicy(parse_baselines("24h/Military:1800"))
+    assert policy.baseline("24h", "General") == 4 * HOUR
+    assert policy.baseline("7d", "Tech") == 4 * HOUR
+    assert policy.baseline("24h", "Military") == 1800
+
+def test_fingerprint_tracks_sources_not_wording():
+    a = headline_fingerprint(news("a", "b", wording="Breaking:"))
+    assert a == headline_fingerprint(news("b", "a", wording="Update -"))
+    # Scheme, www, query strings and fragments do not change the story
+    assert headline_fingerprint(json.dumps([{"titre": "x", "source_url": "https://www.example.com/a/?utm=1"}])) == \
+        headline_fingerprint(json.dumps([{"titre": "y", "source_url": "http://example.com/a#top"}]))
+    # Without a URL the title identifies the headline
+    assert headline_fingerprint(json.dumps([{"titre": "A  Title", "source_url": "#"}])) == \
+        headline_fingerprint(json.dumps([{"titre": "a title"}]))
+
+def test_change_ratio():
+    old = headline_fingerprint(news("a", "b", "c", "d"))
+    assert change_ratio(old, old) == 0.0
+    assert change_ratio(old, headline_fingerprint(news("a", "b", "c", "e"))) == 0.25
+    assert change_ratio(old, headline_fingerprint(news("e", "f", "g", "h"))) == 1.0
+    assert change_ratio([], []) == 0.0
+
+def test_reworded_refresh_extends_ttl(db_service):
+    refresh(db_service, news("a", "b", "c", "d"))
+    assert ttl_of(db_service) == 7200
+    refresh(db_service, news("a", "b", "c", "d", wording="Reworded"))
+    assert ttl_of(db_service) == 10800
+    # One new story out of four stays below the change threshold
+    refresh(db_service, news("a", "b", "c", "e", wording="Again"))
+    assert ttl_of(db_service) == 16200
+    for _ in range(5):
+        refresh(db_service, news("a", "b", "c", "e"))
+    assert ttl_of(db_service) == 8 * HOUR  # Capped at max_ttl
+
+def test_changed_stories_shorten_ttl(db_service):
+    refresh(db_service, news("a", "b"), topic="Military")
+    refresh(db_service, news("c", "d"), topic="Military")
+    assert ttl_of(db_service, "Military") == 1080
+    refresh(db_service, news("c", "e"), topic="Military")  # Half new: at the threshold
+    assert ttl_of(db_service, "Military") == 900  # Floored at min_ttl
+
+def test_lookup_uses_per_key_ttl(db_service):
+    three_hours_ago = datetime.utcnow() - timedelta(hours=3)
+    refresh(db_service, news("quiet"), created_at=three_hours_ago)
+    # Older than the 2h baseline: expired
+    assert db_service.get_cached_news("France", "24h", "General") is None
+
+    refresh(db_service, news("quiet"), created_at=three_hours_ago)
+    refresh(db_service, news("quiet"), created_at=three_hours_ago)
+    # Unchanged twice: TTL is now 4.5h, so the same entry is fresh again
+    assert db_service.get_cached_news("France", "24h", "General") is not None
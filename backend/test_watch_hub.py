@@ -0,0 +1,39 @@
+import pytest
+from watch_hub import WatchHub
+
+FRANCE = ("France", "General", "24h")
+SPAIN = ("Spain", "Tech", "7d")
+
+@pytest.mark.asyncio
+async def test_publish_fans_out_to_watchers_only():
+    hub = WatchHub()
+    alice_tab1 = hub.connect(1, [FRANCE])
+    alice_tab2 = hub.connect(1, [FRANCE])
+    bob = hub.connect(2, [SPAIN])
+
+    assert hub.publish(FRANCE, {"country": "France"}) == 2
+    assert alice_tab1.get_nowait() == {"country": "France"}
+    assert alice_tab2.get_nowait() == {"country": "France"}
+    assert bob.empty()
+
+@pytest.mark.asyncio
+async def test_update_keys_and_disconnect():
+    hub = WatchHub()
+    queue = hub.connect(1, [FRANCE])
+    hub.update_keys(1, [SPAIN])
+    assert hub.publish(FRANCE, {}) == 0
+    assert hub.publish(SPAIN, {}) == 1
+
+    hub.disconnect(1, queue)
+    assert hub.stats() == {"connections": 0, "watched_keys": 0}
+    # Offline users are not tracked
+    hub.update_keys(1, [FRANCE])
+    assert hub.publish(FRANCE, {}) == 0
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_events():
+    hub = WatchHub(max_pending=1)
+    queue = hub.connect(1, [FRANCE])
+    assert hub.publish(FRANCE, {"n": 1}) == 1
+    assert hub.publish(FRANCE, {"n": 2}) == 0
+    assert queue.get_nowait() == {"n": 1}
@@ -0,0 +1,27 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app, get_current_user
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user] = lambda: {"email": "watcher@test.com"}
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def test_watchlist_crud(client):
+    response = client.post("/watchlist", json={"country": "France", "topic": "Tech"})
+    assert response.status_code == 200
+    item = response.json()
+    assert item["time_filter"] == "24h"
+
+    # Adding the same key again is idempotent
+    assert client.post("/watchlist", json={"country": "France", "topic": "Tech"}).json()["id"] == item["id"]
+    assert [w["id"] for w in client.get("/watchlist").json()] == [item["id"]]
+
+    assert client.delete(f"/watchlist/{item['id']}").status_code == 200
+    assert client.get("/watchlist").json() == []
+    assert client.delete(f"/watchlist/{item['id']}").status_code == 404
+
+def test_watchlist_rejects_invalid_key(client):
+    response = client.post("/watchlist", json={"country": "France", "topic": "Gossip"})
+    assert response.status_code == 400
@@ -0,0 +1,153 @@
+import asyncio
+import sqlite3
+import threading
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel, create_engine, Session, select
+from sqlmodel.pool import StaticPool
+from database import DatabaseService, UsageEvent
+from models import QueryHistory, GlobalCache
+from write_queue import WriteQueue
+
+@pytest.fixture(name="db_service")
+def db_service_fixture():
+    # StaticPool so the flush thread sees the same in-memory database
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    yield DatabaseService(engine)
+    SQLModel.metadata.drop_all(engine)
+
+def make_cache(country="France"):
+    return GlobalCache(country=country, time_filter="24h", topic="General", news_json="[]")
+
+@pytest.mark.asyncio
+async def test_rows_flushed_in_one_batch(db_service):
+    batches = []
+    def flush(items):
+        batches.append(len(items))
+        db_service.write_batch(items)
+
+    queue = WriteQueue(flush, flush_interval=0.05)
+    await queue.start()
+    user = db_service.get_or_create_user("writer@example.com")
+    await queue.submit(
+        make_cache(),
+        QueryHistory(user_id=user.id, country="France", time_filter="24h", topic="General", news_json="[]")
+    )
+    await asyncio.sleep(0.2)
+
+    assert batches == [2]
+    with Session(db_service.engine) as session:
+        assert len(session.exec(select(GlobalCache)).all()) == 1
+        assert len(session.exec(select(QueryHistory)).all()) == 1
+    await queue.stop()
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending_rows(db_service):
+    queue = WriteQueue(db_service.write_batch, flush_interval=60)
+    await queue.start()
+    await queue.submit(make_cache("Spain"), make_cache("Italy"))
+    await queue.stop()
+
+    with Session(db_service.engine) as session:
+        countries = {c.country for c in session.exec(select(GlobalCache)).all()}
+    assert countries == {"Spain", "Italy"}
+
+@pytest.mark.asyncio
+async def test_submit_waits_when_full():
+    gate = threading.Event()
+    flushed = []
+    def slow_flush(items):
+        gate.wait(5)
+        flushed.extend(items)
+
+    queue = WriteQueue(slow_flush, max_size=1, flush_interval=0.01, max_batch=1)
+    await queue.start()
+    await queue.submit("a")
+    await asyncio.sleep(0.05)  # worker is now blocked flushing "a"
+    await queue.submit("b")     # fills the queue
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(queue.submit("c"), 0.1)
+
+    gate.set()
+    await queue.stop()
+    assert flushed == ["a", "b"]
+
+def test_submit_writes_directly_when_not_started(db_service):
+    queue = WriteQueue(db_service.write_batch)
+    asyncio.run(queue.submit(make_cache()))
+
+    with Session(db_service.engine) as session:
+        assert session.exec(select(GlobalCache)).first() is not None
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried(db_service):
+    attempts = []
+    def flaky_flush(items):
+        attempts.append(len(items))
+        if len(attempts) < 3:
+            raise RuntimeError("database is locked")
+        db_service.write_batch(items)
+
+    queue = WriteQueue(flaky_flush, flush_interval=60, retry_delay=0.01)
+    await queue.start()
+    await queue.submit(make_cache("Spain"), make_cache("Italy"))
+    await queue.stop()
+
+    assert attempts == [2, 2, 2]
+    with Session(db_service.engine) as session:
+        assert len(session.exec(select(GlobalCache)).all()) == 2
+
+def make_history(db_service):
+    user = db_service.get_or_create_user("writer@example.com")
+    return QueryHistory(user_id=user.id, country="France", time_filter="24h", topic="General", news_json="[]")
+
+def row_counts(db_service):
+    with Session(db_service.engine) as session:
+        return len(session.exec(select(GlobalCache)).all()), len(session.exec(select(QueryHistory)).all())
+
+@pytest.mark.asyncio
+async def test_bad_row_does_not_discard_batch(db_service):
+    bad = GlobalCache(country="Nowhere", time_filter="24h", topic="General", news_json=None)
+    queue = WriteQueue(db_service.write_batch, flush_interval=60, retries=1, retry_delay=0.01)
+    await queue.start()
+    await queue.submit(make_cache("Spain"), bad, make_cache("Italy"))
+    await queue.stop()
+
+    with Session(db_service.engine) as session:
+        countries = {c.country for c in session.exec(select(GlobalCache)).all()}
+    assert countries == {"Spain", "Italy"}
+
+@pytest.mark.asyncio
+async def test_failure_after_flush_keeps_good_rows(db_service):
+    # The rows get ids, then the usage rollup upsert fails
+    bad_event = UsageEvent(None, 1, "France", "General")
+    queue = WriteQueue(db_service.write_batch, flush_interval=60, retries=1, retry_delay=0.01)
+    await queue.start()
+    await queue.submit(make_cache(), make_history(db_service), bad_event)
+    await queue.stop()
+
+    assert row_counts(db_service) == (1, 1)
+
+def test_rows_survive_failed_commit(tmp_path):
+    path = tmp_path / "locked.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 0.1})
+    SQLModel.metadata.create_all(engine)
+    db_service = DatabaseService(engine)
+    rows = [make_cache(), make_history(db_service)]
+
+    # A reader's shared lock makes our COMMIT fail after every row was flushed
+    reader = sqlite3.connect(path, isolation_level=None)
+    reader.execute("BEGIN")
+    reader.execute("SELECT * FROM globalcache").fetchall()
+    with pytest.raises(OperationalError, match="locked"):
+        db_service.write_batch(rows)
+    reader.execute("COMMIT")
+
+    db_service.write_batch(rows)
+    assert row_counts(db_service) == (1, 1)
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Baseline TTL in seconds for every time filter; override per time_filter or
+# time_filter/topic through configuration
+DEFAULT_BASELINES = {"24h": 4 * 3600, "7d": 4 * 3600}
+
+_URL_PREFIX = re.compile(r"^[a-z]+://(www\.)?")
+
+
+def _headline_identity(item: dict) -> str:
+    """Source URL of a headline, falling back to its title when there is none.
+
+    Headlines are reworded on every generation, while the articles they cite
+    are far more stable, so the URL is what identifies a story.
+    """
+    url = str(item.get("source_url") or "").strip().lower()
+    url = _URL_PREFIX.sub("", url.split("#", 1)[0].split("?", 1)[0]).rstrip("/")
+    if url:
+        return url
+    return " ".join(str(item.get("titre", "")).lower().split())
+
+
+def headline_fingerprint(news_json: str) -> List[str]:
+    """Sorted short digests identifying the stories in a news payload."""
+    try:
+        news = json.loads(news_json)
+    except ValueError:
+        news = []
+    return sorted({
+        hashlib.sha256(_headline_identity(item).encode()).hexdigest()[:12]
+        for item in (news if isinstance(news, list) else [])
+        if isinstance(item, dict)
+    })
+
+
+def change_ratio(previous: List[str], current: List[str]) -> float:
+    """Fraction of stories that differ between two fingerprints (0.0 to 1.0)."""
+    size = max(len(previous), len(current))
+    if not size:
+        return 0.0
+    return 1 - len(set(previous) & set(current)) / size
+
+
+def parse_baselines(spec: str) -> Dict[Tuple[str, Optional[str]], int]:
+    """Parse "24h:14400,7d:43200,24h/Military:3600" into baseline TTLs.
+
+    Keys are (time_filter, topic); a topic of None applies to every topic.
+    """
+    baselines = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        scope, _, seconds = item.partition(":")
+        time_filter, _, topic = scope.partition("/")
+        baselines[(time_filter, topic or None)] = int(seconds)
+    return baselines
+
+
+class TTLPolicy:
+    """Per-key cache TTLs that adapt to how often the content changes.
+
+    Every key starts from the baseline for its time_filter (or the more
+    specific time_filter/topic override). Each refresh compares the stories
+    it cites with the previous refresh: when fewer than ``change_threshold``
+    of them are new the TTL stretches by ``extend_factor``, otherwise it
+    shrinks by ``shorten_factor``, always within [min_ttl, max_ttl].
+    """
+
+    def __init__(
+        self,
+        baselines: Optional[Dict[Tuple[str, Optional[str]], int]] = None,
+        min_ttl: int = 15 * 60,
+        max_ttl: int = 24 * 3600,
+        extend_factor: float = 1.5,
+        shorten_factor: float = 0.6,
+        change_threshold: float = 0.5,
+    ):
+        self.baselines = {(tf, None): ttl for tf, ttl in DEFAULT_BASELINES.items()}
+        self.baselines.update(baselines or {})
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.extend_factor = extend_factor
+        self.shorten_factor = shorten_factor
+        self.change_threshold = change_threshold
+
+    def baseline(self, time_filter: str, topic: str) -> int:
+        ttl = self.baselines.get((time_filter, topic))
+        if ttl is None:
+            ttl = self.baselines.get((time_filter, None), DEFAULT_BASELINES["24h"])
+        return self._clamp(ttl)
+
+    def next_ttl(self, current_ttl: int, change_ratio: float) -> int:
+        changed = change_ratio >= self.change_threshold
+        factor = self.shorten_factor if changed else self.extend_factor
+        return self._clamp(round(current_ttl * factor))
+
+    def _clamp(self, ttl: int) -> int:
+        return max(self.min_ttl, min(self.max_ttl, ttl))
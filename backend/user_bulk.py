@@ -0,0 +1,118 @@
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+EXPORT_FIELDS = ["email", "is_admin", "is_active", "max_daily_quota", "today_count"]
+FORMATS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def export_lines(users: Iterator, fmt: str) -> Iterator[str]:
+    """Serialize (User, today_count) pairs as CSV or NDJSON, line by line."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        yield buffer.getvalue()
+    for user, today_count in users:
+        record = {
+            "email": user.email,
+            "is_admin": user.is_admin,
+            "is_active": user.is_active,
+            "max_daily_quota": user.max_daily_quota,
+            "today_count": today_count
+        }
+        if fmt == "csv":
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow([record[f] for f in EXPORT_FIELDS])
+            yield buffer.getvalue()
+        else:
+            yield json.dumps(record) + "\n"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a streamed request body into decoded lines.
+
+    A leading UTF-8 byte order mark (Excel's "CSV UTF-8") is dropped so it
+    does not end up in the first header name.
+    """
+    pending = b""
+    first = True
+    async for chunk in chunks:
+        pending += chunk
+        if first and len(pending) < len(codecs.BOM_UTF8):
+            continue
+        if first:
+            pending = pending.removeprefix(codecs.BOM_UTF8)
+            first = False
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", errors="replace").rstrip("\r")
+    if first:
+        pending = pending.removeprefix(codecs.BOM_UTF8)
+    if pending:
+        yield pending.decode("utf-8", errors="replace").rstrip("\r")
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("1", "true", "yes"):
+        return True
+    if text in ("0", "false", "no"):
+        return False
+    raise ValueError(f"invalid boolean: {value!r}")
+
+
+def validate_user_row(raw: dict, default_quota: int = 5) -> dict:
+    """Normalize an imported row, raising ValueError when it is invalid."""
+    email = str(raw.get("email") or "").strip().lower()
+    if "@" not in email or " " in email:
+        raise ValueError(f"invalid email: {email!r}")
+
+    is_active = raw.get("is_active")
+    quota = raw.get("max_daily_quota")
+    try:
+        quota = default_quota if quota in (None, "") else int(quota)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid max_daily_quota: {quota!r}")
+    if quota < 0:
+        raise ValueError("max_daily_quota must be >= 0")
+
+    return {
+        "email": email,
+        "is_active": True if is_active in (None, "") else _parse_bool(is_active),
+        "max_daily_quota": quota
+    }
+
+
+async def parse_import(
+    lines: AsyncIterator[str], fmt: str
+) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (row_number, row, error) for each non-empty line of the body.
+
+    Row numbers count data lines from 1 (the CSV header is not counted).
+    """
+    header = None
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        if fmt == "csv" and header is None:
+            header = [h.strip() for h in next(csv.reader([line]))]
+            continue
+        row_number += 1
+        try:
+            if fmt == "csv":
+                raw = dict(zip(header, next(csv.reader([line]))))
+            else:
+                raw = json.loads(line)
+                if not isinstance(raw, dict):
+                    raise ValueError("expected a JSON object")
+            yield row_number, validate_user_row(raw), None
+        except ValueError as e:
+            yield row_number, None, str(e)
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Set, Tuple
+
+logger = logging.getLogger("infomap-api")
+
+WatchKey = Tuple[str, str, str]  # (country, topic, time_filter)
+
+
+class WatchHub:
+    """Fans cache refreshes out to the connected subscribers of each key.
+
+    Each open push connection owns a bounded queue. Publishing a refresh puts
+    it on the queue of every connection whose user watches that key; a
+    connection that falls too far behind drops events rather than slowing
+    the publisher down.
+    """
+
+    def __init__(self, max_pending: int = 100):
+        self.max_pending = max_pending
+        self._connections: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._user_keys: Dict[int, Set[WatchKey]] = {}
+        self._watchers: Dict[WatchKey, Set[int]] = defaultdict(set)
+
+    def connect(self, user_id: int, keys: Iterable[WatchKey]) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.max_pending)
+        self._connections[user_id].add(queue)
+        self.update_keys(user_id, keys)
+        return queue
+
+    def disconnect(self, user_id: int, queue: asyncio.Queue):
+        connections = self._connections.get(user_id)
+        if connections is None:
+            return
+        connections.discard(queue)
+        if not connections:
+            del self._connections[user_id]
+            self._set_keys(user_id, set())
+
+    def update_keys(self, user_id: int, keys: Iterable[WatchKey]):
+        """Replace a connected user's watched keys (no-op when offline)."""
+        if user_id in self._connections:
+            self._set_keys(user_id, set(keys))
+
+    def _set_keys(self, user_id: int, keys: Set[WatchKey]):
+        for key in self._user_keys.pop(user_id, set()) - keys:
+            self._watchers[key].discard(user_id)
+            if not self._watchers[key]:
+                del self._watchers[key]
+        for key in keys:
+            self._watchers[key].add(user_id)
+        if keys:
+            self._user_keys[user_id] = keys
+
+    def publish(self, key: WatchKey, event: dict) -> int:
+        """Queue an event for every watcher of ``key``; returns deliveries."""
+        delivered = 0
+        for user_id in self._watchers.get(key, ()):
+            for queue in self._connections.get(user_id, ()):
+                try:
+                    queue.put_nowait(event)
+                    delivered += 1
+                except asyncio.QueueFull:
+                    logger.warning(f"Dropping watch event for slow subscriber (user {user_id})")
+        return delivered
+
+    def stats(self) -> dict:
+        return {
+            "connections": sum(len(c) for c in self._connections.values()),
+            "watched_keys": len(self._watchers)
+        }
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger("infomap-api")
+
+# Sentinel pushed by stop() so the worker flushes everything queued before it
+_STOP = object()
+
+
+class WriteQueue:
+    """In-process queue that batches database inserts off the request path.
+
+    Rows submitted by request handlers are collected by a background task and
+    handed to ``flush_fn`` in batches, so that each batch is written in a
+    single transaction. When the queue is full, ``submit`` waits for room
+    (backpressure) instead of growing without bound. A failed batch is
+    retried with exponential backoff, then written one item at a time so a
+    single bad row cannot discard the rest.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[Any]], None],
+        max_size: int = 1000,
+        flush_interval: float = 0.5,
+        max_batch: int = 200,
+        retries: int = 3,
+        retry_delay: float = 0.1,
+    ):
+        self.flush_fn = flush_fn
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._task = asyncio.create_task(self._run())
+        logger.info("Write queue started")
+
+    async def stop(self):
+        """Flush every pending row and stop the background task."""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        logger.info("Write queue stopped")
+
+    async def submit(self, *items: Any):
+        """Queue rows for insertion, waiting if the queue is full.
+
+        When the worker is not running (e.g. the app was not started through
+        its lifespan), rows are written immediately instead.
+        """
+        if not self.running:
+            self.flush_fn(list(items))
+            return
+        for item in items:
+            await self._queue.put(item)
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stopping = False
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Any]):
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                await asyncio.to_thread(self.flush_fn, batch)
+                return
+            except Exception as e:
+                logger.warning(f"Write queue flush failed ({len(batch)} rows, attempt {attempt + 1}): {e}")
+            if attempt < self.retries:
+                await asyncio.sleep(delay)
+                delay *= 2
+
+        if len(batch) == 1:
+            logger.error(f"Write queue dropped {type(batch[0]).__name__} after {self.retries + 1} attempts")
+            return
+        # Isolate the failing rows so the others still get written
+        lost = 0
+        for item in batch:
+            try:
+                await asyncio.to_thread(self.flush_fn, [item])
+            except Exception as e:
+                lost += 1
+                logger.error(f"Write queue dropped {type(item).__name__}: {e}")
+        if lost:
+            logger.error(f"Write queue lost {lost} of {len(batch)} rows")
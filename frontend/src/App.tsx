@@ -144,7 +144,14 @@ function App() {
       })
       .catch(err => console.error("Could not fetch server history:", err));
 
-    fetch('https://raw.githubusercontent.com/vasturiano/react-globe.gl/master/example/datasets/ne_110m_admin_0_countries.geojson')
+    // Country geometry is served (simplified, pre-compressed) by the backend
+    // under a content-hashed name, so the browser caches it across visits
+    fetch(`${apiBase}/geo/countries`)
+      .then(res => {
+        if (!res.ok) throw new Error("Failed to load country map index");
+        return res.json();
+      })
+      .then(index => fetch(`${apiBase}/geo/countries/${index.simplified}`))
       .then(res => {
         if (!res.ok) throw new Error("Failed to load country map data");
         return res.json();